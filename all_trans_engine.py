@@ -0,0 +1,273 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from thefuzz import fuzz, process
+
+from date_parsing import parse_column_dates
+from excel_stream import excel_value, has_data, iter_values
+from match_cache import CACHE_PATH, MatchCache
+from name_index import NameIndex
+from xlsx_package import replace_sheet
+
+OUTPUT_SKIP = 3  # Header sits below a three-row banner in carrier output files
+DEFAULT_SHEET = "All Trans"
+DRIVER_SUFFIX = "_drivers.xlsx"
+OUTPUT_SUFFIX = "_output.xlsx"
+
+
+def get_valid_column(df, purpose, default_names, required=True):
+    """Find column with fuzzy matching, using defaults if possible"""
+    # First try exact matches to default names
+    for col in default_names:
+        if col in df.columns:
+            return col
+
+    # Then try fuzzy matching
+    for col_name in default_names:
+        match, score = process.extractOne(col_name, df.columns, scorer=fuzz.ratio)
+        if score > 80:
+            return match
+
+    # If not found and required, return first column
+    if required and len(df.columns) > 0:
+        return df.columns[0]
+
+    return None
+
+
+def default_sheet(sheet_names):
+    """Sheet processed unless the user picks another one"""
+    return DEFAULT_SHEET if DEFAULT_SHEET in sheet_names else sheet_names[0]
+
+
+def driver_columns(drivers):
+    """Auto-detect the driver list columns used by the transfer"""
+    return {
+        "driver_name": get_valid_column(drivers, "driver names", ['name', 'driver name', 'full name']),
+        "hire_date": get_valid_column(drivers, "hire dates", ['hire date', 'date of hire', 'doh'], False),
+        "dob": get_valid_column(drivers, "date of birth", ['dob', 'date of birth', 'birth date'], False),
+        "license": get_valid_column(drivers, "license state", ['license state', 'lic state', 'state'], False),
+    }
+
+
+def detect_columns(drivers, output):
+    """Auto-detect the driver list and output columns used by the transfer"""
+    return {
+        **driver_columns(drivers),
+        "output_name": get_valid_column(output, "driver names", ['Name of Driver', 'Driver Name', 'Name']),
+        "output_dob": get_valid_column(output, "date of birth", ['DOB', 'Date of Birth'], False) or "DOB",
+        "output_license": get_valid_column(output, "license state", ['Lic State', 'License State', 'State'], False) or "Lic State",
+        "output_notes": get_valid_column(output, "notes", ['Notes', 'Remarks', 'Comments']) or "Notes",
+        "output_hire": get_valid_column(output, "hire date", ['DOH', 'Hire Date', 'Date of Hire'], False) or "DOH",
+    }
+
+
+def read_drivers(source, skiprows=0):
+    """Driver list holding only the columns driver_columns() picks, streamed in read-only mode.
+
+    Only the header row is read to detect the columns; the sheet is then
+    streamed once, keeping just those cells and leaving pandas' parser to
+    infer dtypes as read_excel would. Column names (Unnamed, duplicate
+    suffixes) match a full read_excel, and the license state is stored as a
+    category.
+    """
+    header = pd.read_excel(source, skiprows=skiprows, nrows=0)
+    columns = driver_columns(header)
+    names = list(dict.fromkeys(col for col in columns.values() if col is not None))
+    positions = sorted(header.columns.get_loc(col) for col in names)
+    data = []
+    last_row_with_data = -1
+    for row in iter_values(source):
+        if has_data(row):
+            last_row_with_data = len(data)
+        data.append([excel_value(row[pos]) if pos < len(row) else "" for pos in positions])
+    data = data[:last_row_with_data + 1]
+    drivers = TextParser(data, header=0, skiprows=skiprows, skip_blank_lines=False).read()
+    drivers.columns = [header.columns[pos] for pos in positions]
+    if columns["license"] and pd.api.types.is_string_dtype(drivers[columns["license"]]):
+        drivers[columns["license"]] = drivers[columns["license"]].astype("category")
+    return drivers
+
+
+def prepare_output(output, columns):
+    """Add any missing transfer columns to the output frame, typed so they accept copied values"""
+    for col in [columns["output_dob"], columns["output_license"], columns["output_notes"], columns["output_hire"]]:
+        if col not in output.columns:
+            output[col] = ""
+        # Blank columns are read as float64, which rejects text such as "MATCH FOUND"
+        output[col] = output[col].astype(object)
+    return output
+
+
+def normalize_dates(drivers, columns):
+    """Drivers frame with text hire dates and DOBs turned into dates, so they are written as date cells.
+
+    Each column is read in the one format its text values share (see
+    parse_column_dates). Cells that are not text, do not fit that format or
+    are ambiguous in it keep their original value.
+    """
+    normalized = drivers
+    for col in {columns["hire_date"], columns["dob"]} - {None}:
+        values = drivers[col].to_numpy(dtype=object)
+        parsed = parse_column_dates(values)
+        is_date = np.fromiter(
+            (type(v) is str and d is not None for v, d in zip(values, parsed)), dtype=bool, count=len(values)
+        )
+        if is_date.any():
+            if normalized is drivers:
+                normalized = drivers.copy()
+            normalized[col] = pd.Series(np.where(is_date, parsed, values), index=drivers.index, dtype=object)
+    return normalized
+
+
+def match_drivers(drivers, output, columns, workers=-1, progress=None, cache=None):
+    """Copy driver details onto matched output rows and append unmatched drivers as MISSING MVR.
+
+    Returns the new output frame and a stats dict with original, matched,
+    added, exact and fuzzy counts. A MatchCache, if given, supplies the
+    matches earlier runs found against the same roster.
+    """
+    drivers = normalize_dates(drivers, columns)
+    transfers = [
+        (columns["hire_date"], columns["output_hire"]),
+        (columns["dob"], columns["output_dob"]),
+        (columns["license"], columns["output_license"]),
+    ]
+    transfers = [(src, dst) for src, dst in transfers if src]
+    driver_names = drivers[columns["driver_name"]].tolist()
+    driver_index = NameIndex(driver_names)
+    matches = driver_index.match_all(
+        output[columns["output_name"]].tolist(), workers=workers, progress=progress, cache=cache
+    )
+    matched_driver_positions = {pos for pos in matches if pos is not None}
+    match_count = 0
+    for idx, driver_pos in zip(output.index, matches):
+        if driver_pos is not None:
+            driver_row = drivers.iloc[driver_pos]
+            output.at[idx, columns["output_notes"]] = "MATCH FOUND"
+            for src, dst in transfers:
+                output.at[idx, dst] = driver_row[src]
+            match_count += 1
+
+    new_rows = []
+    for driver_pos, (_, driver_row) in enumerate(drivers.iterrows()):
+        if driver_pos not in matched_driver_positions:
+            new_row = {col: "" for col in output.columns}
+            new_row[columns["output_name"]] = driver_row[columns["driver_name"]]
+            for src, dst in transfers:
+                new_row[dst] = driver_row[src]
+            new_row[columns["output_notes"]] = "MISSING MVR"
+            new_rows.append(new_row)
+    stats = {
+        "original": len(output),
+        "matched": match_count,
+        "added": len(new_rows),
+        "exact": driver_index.resolved["exact"],
+        "fuzzy": driver_index.resolved["fuzzy"],
+    }
+    if new_rows:
+        output = pd.concat([output, pd.DataFrame(new_rows)], ignore_index=True)
+    return output, stats
+
+
+def write_workbook(output, sheet, output_file):
+    """Original output workbook with only the processed sheet rewritten; other sheets are copied untouched"""
+    return replace_sheet(output_file, sheet, output)
+
+
+def result_filename():
+    timestamp = datetime.now().strftime("%m%d%Y")
+    return f"Driver_Matching_Result_{timestamp}.xlsx"
+
+
+def process_pair(driver_path, output_path, result_path, driver_skip=0, sheet=None, workers=-1, cache_path=CACHE_PATH):
+    """Run the full All Trans pipeline for one driver/output workbook pair and save the result.
+
+    The match cache is opened without eviction, which main runs once before
+    starting the workers.
+    """
+    started = time.perf_counter()
+    cache = MatchCache(cache_path, maintain=False) if cache_path else None
+    sheet_names = pd.ExcelFile(output_path).sheet_names
+    sheet = sheet or default_sheet(sheet_names)
+    drivers = read_drivers(driver_path, driver_skip)
+    output = pd.read_excel(output_path, sheet_name=sheet, skiprows=OUTPUT_SKIP)
+    columns = detect_columns(drivers, output)
+    output = prepare_output(output, columns)
+    try:
+        output, stats = match_drivers(drivers, output, columns, workers=workers, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    with open(result_path, "wb") as f:
+        f.write(write_workbook(output, sheet, output_path).getvalue())
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def find_pairs(folder):
+    """Map each stem to its (driver, output) paths for files named <stem>_drivers.xlsx / <stem>_output.xlsx"""
+    pairs = {}
+    for name in sorted(os.listdir(folder)):
+        if name.startswith("~$"):
+            continue
+        if name.endswith(DRIVER_SUFFIX):
+            stem = name[:-len(DRIVER_SUFFIX)]
+            output_path = os.path.join(folder, stem + OUTPUT_SUFFIX)
+            if os.path.exists(output_path):
+                pairs[stem] = (os.path.join(folder, name), output_path)
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run All Trans MVR driver matching over a folder of workbook pairs.")
+    parser.add_argument("folder", help=f"folder holding <name>{DRIVER_SUFFIX} and <name>{OUTPUT_SUFFIX} pairs")
+    parser.add_argument("--out", help="folder for result workbooks (default: <folder>/results)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--driver-skip", type=int, default=0, help="rows to skip in every driver file")
+    parser.add_argument("--sheet", help=f"output sheet to process (default: '{DEFAULT_SHEET}' or the first sheet)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"name-match cache file (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="score every name pair from scratch")
+    args = parser.parse_args(argv)
+
+    pairs = find_pairs(args.folder)
+    if not pairs:
+        parser.error(f"no *{DRIVER_SUFFIX} / *{OUTPUT_SUFFIX} pairs found in {args.folder}")
+    out_dir = args.out or os.path.join(args.folder, "results")
+    os.makedirs(out_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    failures = 0
+    if not args.no_cache:
+        MatchCache(args.cache).close()  # evict once, not in every worker
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        # One scoring thread per process; the pool already uses every core
+        futures = {
+            pool.submit(process_pair, driver_path, output_path,
+                        os.path.join(out_dir, f"{stem}_{result_filename()}"),
+                        args.driver_skip, args.sheet, 1, None if args.no_cache else args.cache): stem
+            for stem, (driver_path, output_path) in pairs.items()
+        }
+        for future in as_completed(futures):
+            stem = futures[future]
+            try:
+                stats = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"{stem}: FAILED ({e})")
+                continue
+            print(f"{stem}: {stats['matched']}/{stats['original']} matched "
+                  f"({stats['exact']} exact, {stats['fuzzy']} fuzzy), "
+                  f"{stats['added']} added, {stats['seconds']:.1f}s")
+    print(f"Processed {len(pairs) - failures}/{len(pairs)} files in {time.perf_counter() - started:.1f}s -> {out_dir}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+import math
+import warnings
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# Directives a guessed format may use for the vectorised pass; anything else
+# (time zones, two-digit years, week numbers) goes through scalar parsing
+FAST_DIRECTIVES = {"%Y", "%m", "%d", "%H", "%M", "%S", "%f", "%p", "%I"}
+# Guessing is slow per value, so a column's candidate formats come from this many distinct values
+FORMAT_SAMPLE = 200
+
+
+def value_kind(value):
+    """Type of a value, with -0.0 apart from 0.0 since str() tells them apart"""
+    if isinstance(value, float) and value == 0 and math.copysign(1, value) < 0:
+        return (type(value), "-")
+    return type(value)
+
+
+def map_values(values, func):
+    """func applied to each value, calling it once per distinct value.
+
+    Values are grouped by equality and exact type, so 1, 1.0, True and the
+    different blanks (None, NaN, NA, NaT) each get their own call.
+    """
+    cells = np.empty(len(values), dtype=object)
+    cells[:] = values
+    try:
+        value_codes, _ = pd.factorize(cells, use_na_sentinel=False)
+    except TypeError:  # unhashable cells
+        out = np.empty(len(cells), dtype=object)
+        for i, value in enumerate(cells):
+            out[i] = func(value)
+        return out
+    kind_codes, kinds = pd.factorize(np.frompyfunc(value_kind, 1, 1)(cells))
+    groups, _ = pd.factorize(value_codes.astype(np.int64) * max(len(kinds), 1) + kind_codes)
+    _, first = np.unique(groups, return_index=True)
+    results = np.empty(len(first), dtype=object)
+    for group, i in enumerate(first):
+        results[group] = func(cells[i])
+    return results[groups]
+
+
+def parse_date(value):
+    """Calendar date the way the checks read a cell; None for blanks, junk and NaT"""
+    try:
+        parsed = pd.to_datetime(value, errors="coerce").date()
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, date) and parsed is not pd.NaT else None
+
+
+def fast_format(fmt):
+    """True when strings matching fmt parse to the same date as parse_date gives.
+
+    Scalar parsing reads ambiguous dates month first, so a day-first format
+    only agrees on some values; those formats, and formats without clear
+    separators between year, month and day, are left to parse_date.
+    """
+    if not fmt or not all(d in fmt for d in ("%Y", "%m", "%d")):
+        return False
+    directives = {fmt[i:i + 2] for i in range(len(fmt) - 1) if fmt[i] == "%"}
+    if not directives <= FAST_DIRECTIVES or fmt.index("%m") > fmt.index("%d"):
+        return False
+    return "%Y%m" not in fmt and "%m%d" not in fmt and "%d%Y" not in fmt
+
+
+def swap_day_month(fmt):
+    return fmt.replace("%d", "\0").replace("%m", "%d").replace("\0", "%m")
+
+
+def is_date_format(fmt):
+    """True for formats that pin down a full calendar date"""
+    return bool(fmt) and "%d" in fmt and "%m" in fmt and ("%Y" in fmt or "%y" in fmt)
+
+
+def column_formats(texts):
+    """(format, rival) for a column's distinct stripped text values, or (None, None) when no format reads any.
+
+    Candidates are the formats guessed from a sample of the values plus their
+    day/month swaps, and the one that reads the most values wins. When its
+    swap reads just as many, nothing in the column tells the two orders apart
+    and the swap comes back as the rival; otherwise the rival is None.
+    """
+    with warnings.catch_warnings():
+        # Guesses are only candidates; day-first ones are as welcome as month-first ones
+        warnings.simplefilter("ignore", UserWarning)
+        guessed = {guess_datetime_format(text) for text in texts[:FORMAT_SAMPLE]}
+    candidates = {f for fmt in guessed if is_date_format(fmt) for f in (fmt, swap_day_month(fmt))}
+    series = pd.Series(texts, dtype=object)
+    counts = {
+        fmt: int(pd.to_datetime(series, format=fmt, errors="coerce").notna().sum()) for fmt in sorted(candidates)
+    }
+    if not counts or max(counts.values()) == 0:
+        return None, None
+    best = max(counts, key=counts.get)
+    rival = swap_day_month(best)
+    return best, (rival if counts.get(rival) == counts[best] else None)
+
+
+def parse_column_dates(values):
+    """Object array of datetime.date for text cells written in their column's format, None for every other cell.
+
+    The format from column_formats is applied to the whole column. Cells it
+    does not read stay None rather than being read month first, and so do
+    cells its rival reads as a different date, since the column cannot say
+    which order they use. Non-text cells are not parsed.
+    """
+    cells = np.empty(len(values), dtype=object)
+    cells[:] = values
+    out = np.full(len(cells), None, dtype=object)
+    is_text = np.fromiter((type(v) is str for v in cells), dtype=bool, count=len(cells))
+    if not is_text.any():
+        return out
+    texts = [text.strip() for text in cells[is_text]]
+    distinct = list(dict.fromkeys(texts))
+    fmt, rival = column_formats(distinct)
+    if fmt is None:
+        return out
+    parsed = pd.to_datetime(pd.Series(distinct, dtype=object), format=fmt, errors="coerce")
+    if rival:
+        swapped = pd.to_datetime(pd.Series(distinct, dtype=object), format=rival, errors="coerce")
+        parsed = parsed.where(parsed == swapped)
+    dates = {text: stamp.date() for text, stamp in zip(distinct, parsed) if pd.notna(stamp)}
+    out[is_text] = [dates.get(text) for text in texts]
+    return out
+
+
+class DateParser:
+    """Turns date columns into calendar dates, parsing each distinct text value once.
+
+    The format of a column is guessed from its first unseen text value and
+    tried on all of its distinct text values in one vectorised call; values it
+    does not fit fall back to parse_date. Results are remembered across
+    columns, so a DOB, hire date and expiry column share one memo. parse()
+    gives exactly what parse_date gives for every cell, which is what the QC
+    checks expect; rewriting dates in a sheet uses parse_column_dates instead.
+    """
+
+    def __init__(self):
+        self.memo = {}
+
+    def parse(self, values):
+        """Object array of datetime.date (or None) for a column's values"""
+        cells = np.empty(len(values), dtype=object)
+        cells[:] = values
+        is_text = np.fromiter((type(v) is str for v in cells), dtype=bool, count=len(cells))
+        out = np.empty(len(cells), dtype=object)
+        if (~is_text).any():
+            out[~is_text] = map_values(cells[~is_text], parse_date)
+        if is_text.any():
+            texts = cells[is_text]
+            self.learn(pd.unique(texts))
+            out[is_text] = [self.memo[text] for text in texts]
+        return out
+
+    def learn(self, texts):
+        pending = [text for text in texts if text not in self.memo]
+        if not pending:
+            return
+        with warnings.catch_warnings():
+            # Guessing only picks a format to try; day-first guesses are discarded below
+            warnings.simplefilter("ignore", UserWarning)
+            fmt = guess_datetime_format(pending[0].strip())
+        if fast_format(fmt):
+            parsed = pd.to_datetime(pd.Series(pending, dtype=object), format=fmt, errors="coerce")
+            for text, stamp in zip(pending, parsed):
+                if stamp is not pd.NaT:
+                    self.memo[text] = stamp.date()
+        for text in pending:
+            if text not in self.memo:
+                self.memo[text] = parse_date(text)
@@ -0,0 +1,33 @@
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+
+
+def excel_value(value):
+    """Cell value as pandas' openpyxl reader hands it to the parser"""
+    if value is None:
+        return ""
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def has_data(row):
+    """True when a raw row holds anything pandas would not read as blank"""
+    return row.count(None) + row.count("") < len(row)
+
+
+def iter_values(source, sheet_name=0):
+    """Raw cell value tuples of a sheet, streamed in read-only mode (sheet by position or name)"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        # Stored dimensions are often wrong; pandas resets them too
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        wb.close()
@@ -3,12 +3,130 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta, time
 
+from qc_logger import flush_submissions
+from task_store import LEGACY_CSV_PATH, TaskStore, prepare_store
+
+SHIFT_START = time(18, 30)
+CACHE_ENTRIES = 64  # cached leaderboards and user views kept across sessions
+MAX_TIMELINE_POINTS = 500
+# Timeline bucket sizes, smallest first, with a nominal length to estimate the bucket count
+TIMELINE_BUCKETS = [
+    ("h", "hour", pd.Timedelta(hours=1)),
+    ("6h", "6 hours", pd.Timedelta(hours=6)),
+    ("D", "day", pd.Timedelta(days=1)),
+    ("W", "week", pd.Timedelta(days=7)),
+    ("MS", "month", pd.Timedelta(days=31)),
+    ("QS", "quarter", pd.Timedelta(days=92)),
+    ("YS", "year", pd.Timedelta(days=366)),
+]
+
+
+# 📅 Shift-Day Mapping (6:30 PM to 3:30 AM)
+def qc_shift_days(times):
+    """Weekday name of the QC shift each timestamp falls in, NaN outside shift hours (vectorised)"""
+    if times.dt.tz is None:
+        times = times.dt.tz_localize('Asia/Kolkata')
+    time_of_day = times - times.dt.normalize()
+    evening = time_of_day >= pd.Timedelta(hours=18, minutes=30)  # After 6:30 PM
+    morning = time_of_day <= pd.Timedelta(hours=3, minutes=30)  # Before 3:30 AM — previous day
+    days = times.where(evening, times - pd.Timedelta(days=1)).dt.day_name()
+    return days.where(evening | morning)
+
+
+def recent_shift_summary(store, user, cutoff):
+    """Tasks and mean QC_Passed per QC shift day for a user's submissions at or after cutoff.
+
+    Shifts that start after cutoff come from the store's shift rollup; only
+    the tasks of the shift cutoff falls in are read one by one.
+    """
+    first_full = cutoff.date() if cutoff.time() <= SHIFT_START else cutoff.date() + timedelta(days=1)
+    full = store.shift_rollup(user, first_full)
+    full["QC_Shift_Day"] = pd.to_datetime(full["shift_date"]).dt.day_name()
+    partial = store.user_tasks(user, since=cutoff, until=datetime.combine(first_full, SHIFT_START))
+    partial["QC_Shift_Day"] = qc_shift_days(partial["SubmissionTime"])
+    partial = partial.dropna(subset=["QC_Shift_Day"])
+    counts = pd.concat([
+        full[["QC_Shift_Day", "tasks", "passed_sum", "passed_count"]],
+        pd.DataFrame({
+            "QC_Shift_Day": partial["QC_Shift_Day"],
+            "tasks": 1,
+            "passed_sum": partial["QC_Passed"].fillna(0),
+            "passed_count": partial["QC_Passed"].notna().astype(int),
+        }),
+    ])
+    summary = counts.groupby("QC_Shift_Day").sum().reset_index()
+    summary["Accuracy"] = summary["passed_sum"] / summary["passed_count"]
+    return summary.rename(columns={"tasks": "Tasks"})[["QC_Shift_Day", "Tasks", "Accuracy"]]
+
+
+def downsample_timeline(user_data, max_points=MAX_TIMELINE_POINTS):
+    """Timeline points to plot, and the bucket they average over (None when every task is plotted).
+
+    Longer histories are averaged into the smallest time bucket that covers
+    the user's date range in at most max_points buckets; empty buckets are
+    dropped and each point keeps its task count.
+    """
+    if len(user_data) <= max_points:
+        return user_data, None
+    series = user_data.dropna(subset=["SubmissionTime"]).set_index("SubmissionTime")["QC_Passed"]
+    span = series.index.max() - series.index.min()
+    freq, label, width = next(
+        ((freq, label, width) for freq, label, width in TIMELINE_BUCKETS if span / width < max_points - 1),
+        TIMELINE_BUCKETS[-1]
+    )
+    buckets = series.resample(freq).agg(["mean", "size"])
+    buckets = buckets[buckets["size"] > 0]
+    timeline = pd.DataFrame({
+        "SubmissionTime": buckets.index, "QC_Passed": buckets["mean"].to_numpy(), "Tasks": buckets["size"].to_numpy()
+    })
+    return timeline, label
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def load_leaderboard(version, _store):
+    """Leaderboard table, user list and chart for one store version, shared across sessions"""
+    leaderboard = _store.leaderboard().sort_values("Avg_Accuracy", ascending=False)
+    user_ids = _store.user_ids()
+    leaderboard["Avg_Accuracy"] = (leaderboard["Avg_Accuracy"] * 100).round(2)
+    fig = px.bar(
+        leaderboard, x="UserID", y="Avg_Accuracy", text="Tasks",
+        title="🔍 Accuracy by User", color="Avg_Accuracy",
+        color_continuous_scale="greens"
+    )
+    return leaderboard, user_ids, fig
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def load_user_view(version, user, _store):
+    """A user's summary row and timeline chart for one store version, shared across sessions"""
+    summary = _store.leaderboard(user)
+    user_data = _store.user_tasks(user, columns=("SubmissionTime", "QC_Passed"))
+    # 📈 Accuracy Over Time (Timeline), averaged per time bucket for long histories
+    timeline, bucket = downsample_timeline(user_data)  # already in SubmissionTime order
+    fig2 = px.line(
+        timeline, x="SubmissionTime", y="QC_Passed", markers=True,
+        hover_data=["Tasks"] if bucket else None,
+        title="Trend of QC Outcomes Over Time" + (f" (mean per {bucket})" if bucket else "")
+    )
+    fig2.update_traces(line=dict(color="#00BFFF"))
+    return summary, fig2
+
+
 def insight_dashboard_app():
     st.title("📊 Oogway Insights Dashboard")
 
-    try:
-        df = pd.read_csv("task_data.csv", parse_dates=["SubmissionTime"])
-    except FileNotFoundError:
+    problem = flush_submissions()
+    if problem:
+        st.error(f"⚠️ {problem}")
+    prepare_store(legacy_csv=LEGACY_CSV_PATH)
+    # Every read this rerun makes shares one read-only connection
+    with TaskStore(read_only=True) as store:
+        show_dashboard(store)
+
+
+def show_dashboard(store):
+    """Render the dashboard for the signed-in user from an open TaskStore"""
+    if store.is_empty():
         st.warning("No task data found yet. Users need to submit via QC Radar.")
         return
 
@@ -16,6 +134,7 @@ def insight_dashboard_app():
         st.error("User not authenticated.")
         return
 
+    version = store.version()
     current_user = st.session_state["username"]
     role = st.session_state["role"]
     st.markdown(f"### 👤 Welcome, **{current_user}** ({role.upper()})")
@@ -24,66 +143,37 @@ def insight_dashboard_app():
     if role.lower() == "admin":
         st.markdown("#### 🧮 All Users Leaderboard")
 
-        leaderboard = (
-            df.groupby("UserID")
-              .agg(Tasks=("TaskID", "count"),
-                   Avg_Accuracy=("QC_Passed", "mean"),
-                   Last_Submission=("SubmissionTime", "max"))
-              .reset_index()
-              .sort_values("Avg_Accuracy", ascending=False)
-        )
-        leaderboard["Avg_Accuracy"] = (leaderboard["Avg_Accuracy"] * 100).round(2)
+        leaderboard, user_ids, fig = load_leaderboard(version, store)
         st.dataframe(leaderboard, use_container_width=True)
-
-        fig = px.bar(
-            leaderboard, x="UserID", y="Avg_Accuracy", text="Tasks",
-            title="🔍 Accuracy by User", color="Avg_Accuracy",
-            color_continuous_scale="greens"
-        )
         st.plotly_chart(fig, use_container_width=True)
 
-        selected_user = st.selectbox("👥 Select user for detailed view", df["UserID"].unique())
-        user_data = df[df["UserID"] == selected_user]
+        selected_user = st.selectbox("👥 Select user for detailed view", user_ids)
     else:
         st.markdown("#### 🧠 Your QC Performance")
-        user_data = df[df["UserID"] == current_user]
+        selected_user = current_user
+
+    summary, fig2 = load_user_view(version, selected_user, store)
 
-    if user_data.empty:
+    if summary.empty:
         st.info("No task submissions found for this user.")
         return
 
     # 🧾 Performance Summary
-    total_tasks = user_data.shape[0]
-    avg_accuracy = round(user_data["QC_Passed"].mean() * 100, 2)
-    last_time = user_data["SubmissionTime"].max().strftime("%b %d, %Y %I:%M %p")
+    total_tasks = int(summary["Tasks"].iloc[0])
+    avg_accuracy = round(summary["Avg_Accuracy"].iloc[0] * 100, 2)
+    last_time = summary["Last_Submission"].iloc[0].strftime("%b %d, %Y %I:%M %p")
     st.metric("📦 Total Tasks", total_tasks)
     st.metric("🎯 Avg Accuracy", f"{avg_accuracy}%")
     st.metric("🕒 Last Submission", last_time)
 
-    # 📅 Shift-Day Mapping (6:30 PM to 3:30 AM)
-    def map_qc_shift_day(ts):
-        ts = ts.tz_localize('Asia/Kolkata') if ts.tzinfo is None else ts
-        if ts.time() >= time(18, 30):  # After 6:30 PM
-            return ts.strftime("%A")
-        elif ts.time() <= time(3, 30):  # Before 3:30 AM — previous day
-            return (ts - pd.Timedelta(days=1)).strftime("%A")
-        return None
-
-    user_data["QC_Shift_Day"] = user_data["SubmissionTime"].apply(map_qc_shift_day)
     recent_cutoff = datetime.now() - timedelta(days=5)
-    last_5_days = user_data[user_data["SubmissionTime"] >= recent_cutoff]
-    last_5_days = last_5_days.dropna(subset=["QC_Shift_Day"])
+    shift_summary = recent_shift_summary(store, selected_user, recent_cutoff)
 
     # 🔍 Shift-based Accuracy Breakdown
     st.markdown("#### 📆 Accuracy by QC Shift Day (6:30 PM – 3:30 AM)")
-    if last_5_days.empty:
+    if shift_summary.empty:
         st.info("No submissions in the past 5 shift days.")
     else:
-        shift_summary = (
-            last_5_days.groupby("QC_Shift_Day")
-                       .agg(Tasks=("TaskID", "count"), Accuracy=("QC_Passed", "mean"))
-                       .reset_index()
-        )
         day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
         shift_summary["Accuracy"] = (shift_summary["Accuracy"] * 100).round(2)
         shift_summary["QC_Shift_Day"] = pd.Categorical(shift_summary["QC_Shift_Day"], categories=day_order, ordered=True)
@@ -99,10 +189,4 @@ def insight_dashboard_app():
 
     # 📈 Accuracy Over Time (Timeline)
     st.markdown("#### 🪄 Full Task Timeline")
-    timeline = user_data.sort_values("SubmissionTime", ascending=True)
-    fig2 = px.line(
-        timeline, x="SubmissionTime", y="QC_Passed", markers=True,
-        title="Trend of QC Outcomes Over Time"
-    )
-    fig2.update_traces(line=dict(color="#00BFFF"))
     st.plotly_chart(fig2, use_container_width=True)
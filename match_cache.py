@@ -0,0 +1,131 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from name_index import MATCH_THRESHOLDS, MATCH_VERSION
+
+CACHE_PATH = "name_match_cache.sqlite"
+MAX_AGE_DAYS = 120
+MAX_ENTRIES = 500_000
+
+
+def config_key():
+    """Fingerprint of everything that can change a match decision"""
+    config = json.dumps({"thresholds": MATCH_THRESHOLDS, "version": MATCH_VERSION}, sort_keys=True)
+    return hashlib.sha1(config.encode()).hexdigest()
+
+
+def pack_positions(positions):
+    return np.asarray(positions, dtype="<i4").tobytes()
+
+
+def unpack_positions(blob):
+    return np.frombuffer(blob, dtype="<i4").tolist()
+
+
+class MatchCache:
+    """On-disk memo of fuzzy matching results per roster and query name, shared across runs.
+
+    Each entry holds how far through the roster a normalized name has been
+    scored, the positions it matched there and the taken ones it skipped
+    (see NameIndex.match), so a rerun scores nothing it already scored. Entries are tagged with
+    config_key(); entries from other MATCH_THRESHOLDS or MATCH_VERSION are
+    never read and age out. With maintain, opening the cache also evicts
+    entries unused for max_age_days and the least recently used beyond
+    max_entries; batch runs do that once in the parent and open the cache
+    in workers with maintain=False.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES, maintain=True):
+        self.config = config_key()
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.entries = {}
+        self.pending = {}
+        self.touched = set()
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS matches ("
+                "config TEXT, roster TEXT, query TEXT, hits BLOB, skipped BLOB, scored INTEGER, used REAL, "
+                "PRIMARY KEY (config, roster, query))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS matches_used ON matches (used)")
+        if maintain:
+            self.evict()
+
+    def evict(self):
+        """Remove entries older than max_age_days, then the least recently used beyond max_entries"""
+        cutoff = time.time() - self.max_age_days * 86400
+        with self.conn:
+            # Per-pair decisions and pickled rosters from earlier versions of the cache
+            self.conn.execute("DROP TABLE IF EXISTS decisions")
+            self.conn.execute("DROP TABLE IF EXISTS rosters")
+            self.conn.execute("DELETE FROM matches WHERE used < ?", (cutoff,))
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM matches").fetchone()
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM matches WHERE rowid IN (SELECT rowid FROM matches ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def clear(self):
+        self.entries.clear()
+        self.pending.clear()
+        self.touched.clear()
+        with self.conn:
+            self.conn.execute("DELETE FROM matches")
+
+    def lookup(self, roster, query_key):
+        """(hits, skipped, scored) known for a query name against a roster, or ([], [], 0).
+
+        Every candidate below roster position scored was either checked, with
+        hits listing those that matched, or skipped. A roster's entries are
+        read in one query the first time it is looked up.
+        """
+        if roster not in self.entries:
+            rows = self.conn.execute(
+                "SELECT query, hits, skipped, scored FROM matches WHERE config = ? AND roster = ?",
+                (self.config, roster)
+            )
+            self.entries[roster] = {
+                query: (unpack_positions(hits), unpack_positions(skipped), scored)
+                for query, hits, skipped, scored in rows
+            }
+        entry = self.entries[roster].get(query_key)
+        if entry is None:
+            return [], [], 0
+        self.touched.add((roster, query_key))
+        return entry
+
+    def record(self, roster, query_key, hits, skipped, scored):
+        """Buffer an updated (hits, skipped, scored) entry until flush()"""
+        self.entries.setdefault(roster, {})[query_key] = (hits, skipped, scored)
+        self.pending[(roster, query_key)] = (hits, skipped, scored)
+
+    def flush(self):
+        """Write buffered entries and refresh the age of entries that were reused"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches (config, roster, query, hits, skipped, scored, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (self.config, roster, query, pack_positions(hits), pack_positions(skipped), scored, now)
+                    for (roster, query), (hits, skipped, scored) in self.pending.items()
+                ]
+            )
+            self.conn.executemany(
+                "UPDATE matches SET used = ? WHERE config = ? AND roster = ? AND query = ?",
+                [(now, self.config, roster, query) for roster, query in self.touched - self.pending.keys()]
+            )
+        self.pending.clear()
+        self.touched.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
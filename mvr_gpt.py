@@ -8,109 +8,266 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 import joblib
+from io import BytesIO
 from sklearn.preprocessing import LabelEncoder
 
-def mvr_gpt_app():
-    st.markdown('<div class="custom-heading">MVR GPT Tool</div>', unsafe_allow_html=True)
-    st.image("https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcTIGEqSiDgNs2c5VkcZ9eUba_LVjvy74f7w-w&s",
-             width=100, caption="")
+from workbook_cache import content_hash, read_excel
 
-    @st.cache_data
-    def load_data():
-        try:
-            df = pd.read_excel("Violation GPT MODEL.xlsx", engine="openpyxl")
-            df.columns = df.columns.str.strip()
-            df = df.dropna(subset=["Violation Description", "Category"])
-            df["Violation Description"] = df["Violation Description"].str.strip()
-            return df
-        except Exception as e:
-            st.error(f"❌ Failed to load data: {e}")
-            return pd.DataFrame()
+REFERENCE_PATH = "Violation GPT MODEL.xlsx"
+MODEL_PATH = "violation_model.pkl"
+PUNCTUATION = re.compile(r"[^\w\s]")
+BULK_COLUMNS = ["Predicted Category", "Tier", "Confidence"]
 
-    df = load_data()
-    if df.empty:
-        st.stop()
+non_moving_keywords = [
+    "improper equipment", "defective equipment", "traffic fines", "penalties",
+    "lic", "fine", "court", "suspension", "misc", "sticker", "tags", "miscellaneous",
+    "background check", "notice", "seat belt", "insurance", "certificate",
+    "weighing", "loading", "length", "carrying", "loads", "susp", "seatbelt",
+    "failure to signal", "illegal stop", "obstructing traffic","law"
+]
+non_moving_keywords = [kw.lower() for kw in non_moving_keywords]
 
-    X_text = df["Violation Description"].str.lower()
-    y = df["Category"]
+rules = {
+    "Accident Violation": ["collision", "crash", "hit and run"],
+    "Major Violation": ["reckless", "dui", "excessive speeding", "dangerous"],
+    "Prohibited Violation": ["prohibited", "unauthorized", "restricted"],
+    "Minor Violation": ["speeding", "late payment", "parking violation"]
+}
+
+
+def load_reference(path=REFERENCE_PATH):
+    """Violation reference sheet with blank descriptions and categories dropped"""
+    df = pd.read_excel(path, engine="openpyxl")
+    df.columns = df.columns.str.strip()
+    df = df.dropna(subset=["Violation Description", "Category"])
+    df["Violation Description"] = df["Violation Description"].str.strip()
+    return df
+
+
+def normalize_description(text):
+    """Lowercased description with punctuation turned into spaces and whitespace collapsed"""
+    return " ".join(PUNCTUATION.sub(" ", text.lower()).split())
 
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
 
+def exact_lookups(df):
+    """Description -> category dicts for the exact tier: by lowercase text, then by normalized text.
+
+    The first reference row wins when descriptions repeat, as with the
+    old row scan.
+    """
+    by_text = {}
+    by_normalized = {}
+    for description, category in zip(df["Violation Description"], df["Category"]):
+        if not isinstance(description, str):  # the .str scan never matched these either
+            continue
+        by_text.setdefault(description.lower(), category)
+        normalized = normalize_description(description)
+        if normalized:
+            by_normalized.setdefault(normalized, category)
+    return by_text, by_normalized
+
+
+def rule_categories(categories):
+    """Rule label -> reference category it names, e.g. "Accident Violation" -> "ACCIDENT".
+
+    Labels are matched case-insensitively without the " Violation" suffix;
+    a label with no such category in the reference sheet maps to itself.
+    """
+    by_name = {}
+    for category in categories:
+        if isinstance(category, str):
+            by_name.setdefault(category.strip().lower(), category)
+    labels = ["Non-Moving Violation", *rules]
+    return {label: by_name.get(label.lower().removesuffix(" violation"), label) for label in labels}
+
+
+def train_model(df):
+    """Fit the TF-IDF vectorizer, label encoder and classifier on a reference sheet"""
+    X_text = df["Violation Description"].str.lower()
+    label_encoder = LabelEncoder()
+    y_encoded = label_encoder.fit_transform(df["Category"])
     tfidf = TfidfVectorizer(ngram_range=(1, 2), stop_words="english")
     X_vect = tfidf.fit_transform(X_text)
+    model = Pipeline([("clf", LogisticRegression(max_iter=500))])
+    model.fit(X_vect, y_encoded)
+    return model, tfidf, label_encoder
+
 
-    def train_and_save_model(X_vect, y_encoded, tfidf, label_encoder, model_path):
-        model = Pipeline([("clf", LogisticRegression(max_iter=500))])
-        model.fit(X_vect, y_encoded)
-        joblib.dump((model, tfidf, label_encoder), model_path)
-        return model, tfidf, label_encoder
+@st.cache_resource(show_spinner="Loading violation model...")
+def load_bundle(data_hash, reference_path=REFERENCE_PATH, model_path=MODEL_PATH):
+    """Reference sheet and fitted model for one version of the reference workbook, loaded once per process.
 
-    model_path = "violation_model.pkl"
-    if not os.path.exists(model_path):
-        st.info("Training model for the first time...")
-        model, tfidf, label_encoder = train_and_save_model(X_vect, y_encoded, tfidf, label_encoder, model_path)
+    The pickle at model_path records the hash of the workbook it was
+    trained on. It is reused only when that hash matches; a pickle from
+    other data, an older (model, tfidf, label_encoder) tuple or one that no
+    longer loads is retrained and overwritten.
+    """
+    df = load_reference(reference_path)
+    saved = None
+    if os.path.exists(model_path):
+        try:
+            saved = joblib.load(model_path)
+        except Exception:
+            saved = None
+    if isinstance(saved, dict) and saved.get("data_hash") == data_hash:
+        model, tfidf, label_encoder = saved["model"], saved["tfidf"], saved["label_encoder"]
+    elif df.empty:
+        model = tfidf = label_encoder = None
     else:
-        loaded_obj = joblib.load(model_path)
-        if isinstance(loaded_obj, tuple) and len(loaded_obj) == 3:
-            model, tfidf, label_encoder = loaded_obj
-        else:
-            st.warning("⚠️ Existing pickle file is invalid. Retraining model...")
-            model, tfidf, label_encoder = train_and_save_model(X_vect, y_encoded, tfidf, label_encoder, model_path)
-
-    non_moving_keywords = [
-        "improper equipment", "defective equipment", "traffic fines", "penalties",
-        "lic", "fine", "court", "suspension", "misc", "sticker", "tags", "miscellaneous",
-        "background check", "notice", "seat belt", "insurance", "certificate",
-        "weighing", "loading", "length", "carrying", "loads", "susp", "seatbelt",
-        "failure to signal", "illegal stop", "obstructing traffic","law"
-    ]
-    non_moving_keywords = [kw.lower() for kw in non_moving_keywords]
-
-    rules = {
-        "Accident Violation": ["collision", "crash", "hit and run"],
-        "Major Violation": ["reckless", "dui", "excessive speeding", "dangerous"],
-        "Prohibited Violation": ["prohibited", "unauthorized", "restricted"],
-        "Minor Violation": ["speeding", "late payment", "parking violation"]
+        model, tfidf, label_encoder = train_model(df)
+        joblib.dump(
+            {"data_hash": data_hash, "model": model, "tfidf": tfidf, "label_encoder": label_encoder}, model_path
+        )
+    by_text, by_normalized = exact_lookups(df)
+    return {
+        "reference": df, "model": model, "tfidf": tfidf, "label_encoder": label_encoder,
+        "by_text": by_text, "by_normalized": by_normalized, "rule_categories": rule_categories(df["Category"]),
     }
 
-    def detect_priority(desc):
-        desc = desc.lower()
-        if any(kw in desc for kw in non_moving_keywords):
-            return "🚨 **Non-Moving Violation**"
-        match = re.search(r"(\d{2,})/(\d{2,})", desc)
-        if match:
-            num, denom = map(int, match.groups())
-            if num < denom:
-                return "Minor Violation"
-            elif num - denom >= 20:
-                return "🚨 Major Violation"
-            else:
-                return "⚠️ Minor Violation"
-        for lbl, kw_list in rules.items():
-            if any(k in desc for k in kw_list):
-                return f"🚨 Rule-Based: **{lbl}**"
-        return "Unknown Violation"
-
-    def classify_violation(description):
-        desc = description.strip().lower()
-        exact = df[df["Violation Description"].str.lower() == desc]
-        if not exact.empty:
-            return f"✅ Exact: **{exact['Category'].values[0]}**"
-        rule = detect_priority(desc)
-        if rule != "Unknown Violation,Better ask QA Team":
-            return rule
-        vec = tfidf.transform([desc])
-        proba = model.predict_proba(vec)
-        idx = np.argmax(proba)
-        predicted_label = label_encoder.inverse_transform([idx])[0]
-        confidence = proba[0][idx] * 100
-        return f"🤖 Partial Prediction: **{predicted_label}** (Confidence: {confidence:.2f}%)"
+
+def rule_category(desc):
+    """(category, display text) from the keyword and speed rules, or None when no rule applies"""
+    desc = desc.lower()
+    if any(kw in desc for kw in non_moving_keywords):
+        return "Non-Moving Violation", "🚨 **Non-Moving Violation**"
+    match = re.search(r"(\d{2,})/(\d{2,})", desc)
+    if match:
+        num, denom = map(int, match.groups())
+        if num < denom:
+            return "Minor Violation", "Minor Violation"
+        elif num - denom >= 20:
+            return "Major Violation", "🚨 Major Violation"
+        else:
+            return "Minor Violation", "⚠️ Minor Violation"
+    for lbl, kw_list in rules.items():
+        if any(k in desc for k in kw_list):
+            return lbl, f"🚨 Rule-Based: **{lbl}**"
+    return None
+
+
+def detect_priority(desc):
+    rule = rule_category(desc)
+    return rule[1] if rule else "Unknown Violation"
+
+
+def exact_category(desc, bundle):
+    """Reference category for a stripped, lowercased description, or None"""
+    category = bundle["by_text"].get(desc)
+    if category is None:
+        category = bundle["by_normalized"].get(normalize_description(desc))
+    return category
+
+
+def classify_violation(description, bundle):
+    desc = description.strip().lower()
+    exact = exact_category(desc, bundle)
+    if exact is not None:
+        return f"✅ Exact: **{exact}**"
+    rule = detect_priority(desc)
+    if rule != "Unknown Violation":
+        return rule
+    vec = bundle["tfidf"].transform([desc])
+    proba = bundle["model"].predict_proba(vec)
+    idx = np.argmax(proba)
+    predicted_label = bundle["label_encoder"].inverse_transform([idx])[0]
+    confidence = proba[0][idx] * 100
+    return f"🤖 Partial Prediction: **{predicted_label}** (Confidence: {confidence:.2f}%)"
+
+
+def classify_many(descriptions, bundle):
+    """Predicted category, tier (Exact, Rule or Model) and confidence for many descriptions at once.
+
+    Each distinct description goes through the same tiers as
+    classify_violation; those left for the model are scored with a single
+    tfidf.transform and predict_proba call. Rule labels are reported as the
+    reference category they name, so the column uses one vocabulary. Exact
+    matches report 100% confidence, rule matches none, and blank cells are
+    left unclassified.
+    """
+    texts = pd.Series(descriptions, dtype=object)
+    keys = [str(v).strip().lower() if pd.notna(v) else "" for v in texts]
+    results = {"": (None, "", None)}
+    pending = []
+    for desc in dict.fromkeys(keys):
+        if desc in results:
+            continue
+        category = exact_category(desc, bundle)
+        if category is not None:
+            results[desc] = (category, "Exact", 100.0)
+            continue
+        rule = rule_category(desc)
+        if rule:
+            results[desc] = (bundle["rule_categories"][rule[0]], "Rule", None)
+            continue
+        pending.append(desc)
+    if pending:
+        proba = bundle["model"].predict_proba(bundle["tfidf"].transform(pending))
+        best = proba.argmax(axis=1)
+        labels = bundle["label_encoder"].inverse_transform(best)
+        for desc, label, p in zip(pending, labels, proba[np.arange(len(pending)), best]):
+            results[desc] = (label, "Model", round(float(p) * 100, 2))
+    return pd.DataFrame([results[key] for key in keys], columns=BULK_COLUMNS, index=texts.index)
+
+
+def default_violation_column(columns):
+    """Index of the first column that looks like a violation description, else 0"""
+    for i, col in enumerate(columns):
+        if any(word in str(col).lower() for word in ("violation", "description")):
+            return i
+    return 0
+
+
+def mvr_gpt_app():
+    st.markdown('<div class="custom-heading">MVR GPT Tool</div>', unsafe_allow_html=True)
+    st.image("https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcTIGEqSiDgNs2c5VkcZ9eUba_LVjvy74f7w-w&s",
+             width=100, caption="")
+
+    try:
+        bundle = load_bundle(content_hash(REFERENCE_PATH))
+    except Exception as e:
+        st.error(f"❌ Failed to load data: {e}")
+        st.stop()
+    if bundle["reference"].empty:
+        st.stop()
 
     user_input = st.text_input("🔍 Enter Violation Description:")
     if user_input:
         if user_input.strip().lower() in ["yogaraj", "yoga"]:
             st.success("🐉 **Dragon Warrior** 🐼")
         else:
-            result = classify_violation(user_input)
-            st.info(result)
\ No newline at end of file
+            result = classify_violation(user_input, bundle)
+            st.info(result)
+
+    # 📂 Bulk classification of a whole MVR sheet
+    st.markdown("### 📂 Classify a Whole Sheet")
+    uploaded = st.file_uploader("Upload an MVR workbook or CSV", type=["xlsx", "csv"])
+    if uploaded:
+        try:
+            sheet = pd.read_csv(uploaded) if uploaded.name.lower().endswith(".csv") else read_excel(uploaded)
+        except Exception as e:
+            st.error(f"❌ Failed to read {uploaded.name}: {e}")
+            st.stop()
+        column = st.selectbox(
+            "Violation description column", list(sheet.columns), index=default_violation_column(sheet.columns)
+        )
+        if st.button("🚀 Classify All"):
+            with st.spinner(f"Classifying {len(sheet)} rows..."):
+                classified = classify_many(sheet[column], bundle)
+                output = sheet.copy()
+                for col in BULK_COLUMNS:
+                    output[col] = classified[col]
+            tiers = classified["Tier"].value_counts()
+            st.success(
+                f"✅ Classified {int(tiers.sum() - tiers.get('', 0))} rows — "
+                f"Exact: {tiers.get('Exact', 0)}, Rule: {tiers.get('Rule', 0)}, Model: {tiers.get('Model', 0)}"
+            )
+            st.dataframe(output[[column] + BULK_COLUMNS].head(1000), use_container_width=True)
+            buffer = BytesIO()
+            output.to_excel(buffer, index=False, engine="openpyxl")
+            buffer.seek(0)
+            st.download_button(
+                label="📥 Download Classified Sheet",
+                data=buffer,
+                file_name="mvr_gpt_classified.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
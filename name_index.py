@@ -0,0 +1,260 @@
+import hashlib
+import re
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz as rapid_fuzz, process
+from thefuzz import fuzz
+
+TITLE_PATTERN = re.compile(r'\b(mr|mrs|ms|dr|jr|sr|iii|ii|iv)\b')
+NON_ALPHA_PATTERN = re.compile(r'[^a-z\s]')
+SPACES_PATTERN = re.compile(r'\s+')
+
+# Minimum (rounded) score for each fuzzy strategy to count as the same person
+MATCH_THRESHOLDS = {"token_set_ratio": 95, "partial_ratio": 96, "token_sort_ratio": 98}
+# Bump when normalize_name or the scoring changes so cached decisions are discarded
+MATCH_VERSION = 1
+# Candidate drivers scored per batch before checking for a hit
+SCORE_BLOCK_SIZE = 512
+
+
+def normalize_name(name):
+    """Enhanced name normalization with title removal and initials handling"""
+    if pd.isna(name) or not name:
+        return []
+    name = str(name).lower()
+    # Remove common prefixes/suffixes
+    name = TITLE_PATTERN.sub('', name)
+    # Remove non-alpha chars except spaces
+    name = NON_ALPHA_PATTERN.sub('', name)
+    # Normalize spaces
+    name = SPACES_PATTERN.sub(' ', name).strip()
+    parts = name.split()
+    if not parts:
+        return []
+
+    formats = []
+    # Full name normal
+    formats.append(' '.join(parts))
+    # First last and last first formats
+    if len(parts) > 1:
+        formats.append(f"{parts[0]} {parts[-1]}")
+        formats.append(f"{parts[-1]} {parts[0]}")
+        formats.append(f"{parts[0]}{parts[-1]}")
+        formats.append(f"{parts[-1]}{parts[0]}")
+
+    # Initial-based formats if middle names exist
+    if len(parts) > 2:
+        first = parts[0]
+        last = parts[-1]
+        initials = ''.join([p[0] for p in parts[1:-1]])
+        formats.append(f"{first} {initials} {last}")
+        formats.append(f"{first} {initials}{last}")
+        formats.append(f"{first}{initials} {last}")
+        formats.append(f"{first}{initials}{last}")
+
+    # Remove duplicates
+    return list(set(formats))
+
+
+def formats_match(formats1, formats2):
+    """Stricter matching with multiple fuzzy strategies over already normalized variants"""
+    for f1 in formats1:
+        for f2 in formats2:
+            if f1 == f2:
+                return True
+            for scorer, threshold in MATCH_THRESHOLDS.items():
+                if getattr(fuzz, scorer)(f1, f2) >= threshold:
+                    return True
+    return False
+
+
+def blocking_keys(formats):
+    """Blocking keys for a name's variants: token trigrams, plus whole tokens too short to have one"""
+    keys = set()
+    for fmt in formats:
+        for token in fmt.split():
+            if len(token) < 3:
+                keys.add(token)
+            for i in range(len(token) - 2):
+                keys.add(token[i:i + 3])
+    return keys
+
+
+def is_short_name(formats):
+    """True when some variant is made only of 1-2 letter tokens (e.g. "al", "wu li").
+
+    partial_ratio can match such a variant as a bare substring of a longer
+    name, so these names cannot be blocked and are compared against everyone.
+    """
+    return any(max(len(token) for token in fmt.split()) < 3 for fmt in formats)
+
+
+class NormalizedName:
+    """A name with its match variants and blocking keys, computed once"""
+
+    __slots__ = ("raw", "formats", "key", "short", "keys")
+
+    def __init__(self, name):
+        self.raw = name
+        self.formats = normalize_name(name)
+        self.key = "|".join(sorted(self.formats))
+        self.short = is_short_name(self.formats)
+        self.keys = blocking_keys(self.formats) if not self.short else set()
+
+
+class NameIndex:
+    """Driver roster normalized once, with a blocking index so each name is only scored against drivers it could match.
+
+    A pair that clears the names_match thresholds shares a whole token or a
+    token trigram across their variants, so the candidate set never drops a
+    real match. Short names (see is_short_name) are never blocked.
+
+    Names sharing a variant (same name, first/last swap, initials) are found
+    through a hash lookup, so only drivers ahead of such a hit are fuzzy
+    scored; resolved counts how many matches each path produced. key
+    identifies the roster for a MatchCache.
+    """
+
+    def __init__(self, names):
+        self.key = hashlib.sha1("\x1f".join(map(repr, names)).encode()).hexdigest()
+        self.names = [NormalizedName(name) for name in names]
+        self.variants = {}
+        self.postings = {}
+        self.unblocked = []
+        self.resolved = {"exact": 0, "fuzzy": 0}
+        for pos, name in enumerate(self.names):
+            if not name.formats:
+                continue
+            for fmt in name.formats:
+                self.variants.setdefault(fmt, []).append(pos)
+            if name.short:
+                self.unblocked.append(pos)
+                continue
+            for key in name.keys:
+                self.postings.setdefault(key, []).append(pos)
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, query):
+        """Roster positions worth scoring against a NormalizedName, in roster order"""
+        if not query.formats:
+            return []
+        if query.short:
+            return range(len(self.names))
+        found = set(self.unblocked)
+        for key in query.keys:
+            found.update(self.postings.get(key, ()))
+        return sorted(found)
+
+    def exact_match(self, query, exclude=()):
+        """First roster position not in exclude sharing a variant with query, or None"""
+        best = None
+        for fmt in query.formats:
+            for pos in self.variants.get(fmt, ()):
+                if pos in exclude:
+                    continue
+                if best is None or pos < best:
+                    best = pos
+                break
+        return best
+
+    def score_block(self, query, positions, workers=-1):
+        """Roster positions from positions whose variants clear a fuzzy threshold against query.
+
+        Every driver variant in the block is scored against every query variant
+        in one rapidfuzz cdist call per strategy, spread over workers threads
+        (-1 uses all cores). Scores are rounded like thefuzz before comparing,
+        so the outcome is the same as formats_match pair by pair.
+        """
+        choices = []
+        owners = []
+        for pos in positions:
+            for fmt in self.names[pos].formats:
+                choices.append(fmt)
+                owners.append(pos)
+        owners = np.array(owners)
+        hit = np.zeros(len(choices), dtype=bool)
+        for scorer, threshold in MATCH_THRESHOLDS.items():
+            rows = np.flatnonzero(~hit)
+            if not len(rows):
+                break
+            scores = process.cdist(
+                [choices[i] for i in rows], query.formats,
+                scorer=getattr(rapid_fuzz, scorer), score_cutoff=threshold - 0.5,
+                dtype=np.float64, workers=workers
+            )
+            hit[rows] = (np.rint(scores) >= threshold).any(axis=1)
+        return sorted(set(owners[hit].tolist()))
+
+    def match(self, name, exclude=(), workers=-1, cache=None):
+        """Roster position of the first driver not in exclude that matches name, or None.
+
+        A shared variant is a match, so an exact hit at position p settles
+        the answer once no earlier candidate passes the fuzzy thresholds:
+        only candidates before p are scored, and none at all when p comes
+        first. The result is the driver the sequential names_match loop picks.
+
+        With a MatchCache, the hits an earlier run found for this name are
+        reused and scoring resumes where that run stopped. Candidates it
+        skipped because they were taken are scored only if they come first
+        and are free this time.
+        """
+        query = name if isinstance(name, NormalizedName) else NormalizedName(name)
+        exact = self.exact_match(query, exclude)
+        limit = len(self.names) if exact is None else exact
+        hits, skipped, scored = cache.lookup(self.key, query.key) if cache is not None else ([], [], 0)
+        found = next((pos for pos in hits if pos < limit and pos not in exclude), None)
+        bound = limit if found is None else found
+        recheck = [pos for pos in skipped if pos < bound and pos not in exclude]
+        changed = bool(recheck)
+        if recheck:
+            rehits = []
+            for start in range(0, len(recheck), SCORE_BLOCK_SIZE):
+                rehits.extend(self.score_block(query, recheck[start:start + SCORE_BLOCK_SIZE], workers))
+            rechecked = set(recheck)
+            hits = sorted(hits + rehits)
+            skipped = [pos for pos in skipped if pos not in rechecked]
+            if rehits:
+                found = rehits[0]
+        if found is None and scored < limit:
+            changed = True
+            positions = [pos for pos in self.candidates(query) if scored <= pos < limit]
+            free = [pos for pos in positions if pos not in exclude]
+            reached = limit
+            for start in range(0, len(free), SCORE_BLOCK_SIZE):
+                block_hits = self.score_block(query, free[start:start + SCORE_BLOCK_SIZE], workers)
+                hits = hits + block_hits
+                if block_hits:
+                    found = block_hits[0]
+                    reached = free[min(start + SCORE_BLOCK_SIZE, len(free)) - 1] + 1
+                    break
+            skipped = skipped + [pos for pos in positions if pos < reached and pos in exclude]
+            scored = reached
+        if cache is not None and changed:
+            cache.record(self.key, query.key, hits, skipped, scored)
+        if found is not None:
+            self.resolved["fuzzy"] += 1
+            return found
+        if exact is not None:
+            self.resolved["exact"] += 1
+        return exact
+
+    def match_all(self, names, workers=-1, progress=None, cache=None):
+        """Match a list of names in order, each driver used at most once.
+
+        Returns one roster position (or None) per name; progress, if given, is
+        called with (done, total) after each name.
+        """
+        taken = set()
+        results = []
+        for done, name in enumerate(names, start=1):
+            pos = self.match(name, exclude=taken, workers=workers, cache=cache)
+            if pos is not None:
+                taken.add(pos)
+            results.append(pos)
+            if progress:
+                progress(done, len(names))
+        if cache is not None:
+            cache.flush()
+        return results
@@ -0,0 +1,124 @@
+import argparse
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from qc_engine import HDVI_SHEET, hdvi_frame, mvr_counts, normalize_mvr_received, run_qc
+
+REPORT_SUFFIX = "_qc_results.xlsx"
+SUMMARY_COLUMNS = [
+    "File", "Report", "Rows", "Confidence", "Valid", "Partial", "High Risk", "MVR TRUE", "MVR FALSE", "Seconds", "Error"
+]
+COUNT_COLUMNS = ["Rows", "Valid", "Partial", "High Risk", "MVR TRUE", "MVR FALSE"]
+
+
+def qc_workbook(name, source):
+    """QC one HDVI workbook (path or raw bytes); returns (summary row, report bytes)"""
+    started = time.perf_counter()
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    df = hdvi_frame(pd.read_excel(source, sheet_name=HDVI_SHEET, header=None))
+    mvr_true = mvr_false = None
+    if "MVR Received" in df.columns:
+        normalize_mvr_received(df)
+        mvr_true, mvr_false = mvr_counts(df["MVR Received"])
+    qc_df, confidence, counts = run_qc(df)
+    report = io.BytesIO()
+    qc_df.to_excel(report, index=False, engine="openpyxl")
+    summary = {
+        "File": name,
+        "Rows": len(qc_df),
+        "Confidence": confidence,
+        "Valid": counts["valid"],
+        "Partial": counts["partial"],
+        "High Risk": counts["fail"],
+        "MVR TRUE": mvr_true,
+        "MVR FALSE": mvr_false,
+        "Seconds": round(time.perf_counter() - started, 2),
+        "Error": "",
+    }
+    return summary, report.getvalue()
+
+
+def report_names(names):
+    """Report file name for each input, with _2, _3, ... added where names would collide in the zip"""
+    taken = set()
+    reports = []
+    for name in names:
+        stem = os.path.splitext(os.path.basename(name))[0]
+        candidate, n = stem, 1
+        # Compare case-insensitively, since the zip may be extracted on Windows
+        while candidate.lower() in taken:
+            n += 1
+            candidate = f"{stem}_{n}"
+        taken.add(candidate.lower())
+        reports.append(candidate + REPORT_SUFFIX)
+    return reports
+
+
+def run_batch(files, jobs=None, progress=None):
+    """QC many HDVI workbooks in a process pool.
+
+    files is a list of (name, path or bytes); names may repeat. Returns the
+    combined summary table, in input order, and a zip holding every report
+    under the name in the summary's Report column. A file that fails gets a
+    summary row with the error instead of stopping the batch. progress, if
+    given, is called with (done, total) as files finish.
+    """
+    reports = report_names([name for name, _ in files])
+    summaries = [None] * len(files)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(qc_workbook, name, source): i for i, (name, source) in enumerate(files)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    summary, report = future.result()
+                    zf.writestr(reports[i], report)
+                    summary["Report"] = reports[i]
+                except Exception as e:
+                    summary = {"File": files[i][0], "Error": str(e)}
+                summaries[i] = summary
+                if progress:
+                    progress(done, len(futures))
+    summary = pd.DataFrame(summaries, columns=SUMMARY_COLUMNS)
+    # Failed files leave blanks, so keep counts as nullable integers rather than floats
+    summary = summary.astype({col: "Int64" for col in COUNT_COLUMNS})
+    archive.seek(0)
+    return summary, archive
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run QC Radar over every HDVI workbook in a folder.")
+    parser.add_argument("folder", help="folder holding the .xlsx files to validate")
+    parser.add_argument("--out", help="folder for qc_summary.csv and qc_reports.zip (default: <folder>/qc_results)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    files = [
+        (name, os.path.join(args.folder, name)) for name in sorted(os.listdir(args.folder))
+        if name.endswith(".xlsx") and not name.startswith("~$") and not name.endswith(REPORT_SUFFIX)
+    ]
+    if not files:
+        parser.error(f"no .xlsx files found in {args.folder}")
+    out_dir = args.out or os.path.join(args.folder, "qc_results")
+    os.makedirs(out_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    summary, archive = run_batch(files, jobs=args.jobs)
+    summary.to_csv(os.path.join(out_dir, "qc_summary.csv"), index=False)
+    with open(os.path.join(out_dir, "qc_reports.zip"), "wb") as f:
+        f.write(archive.getvalue())
+    print(summary.to_string(index=False))
+    failures = int((summary["Error"].fillna("") != "").sum())
+    print(f"Validated {len(files) - failures}/{len(files)} files in {time.perf_counter() - started:.1f}s -> {out_dir}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,624 @@
+import hashlib
+import re
+import time
+from datetime import date
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from date_parsing import DateParser, map_values
+from excel_stream import excel_value, has_data, iter_values
+
+REQUIRED_FIELDS = [
+    "First Name", "Last Name", "Date of Birth", "Age",
+    "Years of Experience", "Hire Date", "Years of Tenure",
+    "License State", "CDL Number", "CDL Type", "Expiration Date"
+]
+ALLOWED_CDL_TYPES = {"A", "B", "C"}
+HDVI_SHEET = "hdvi output"
+HEADER_ROW = 1  # Column names sit below a one-row banner
+CHUNK_ROWS = 5000
+PREVIEW_ROWS = 1000
+# Bump when a check's logic changes so cached row results are discarded
+RULES_VERSION = 1
+FAILED = object()  # Marks a value whose conversion raised
+BLANK_PATTERNS = [re.compile(r"(?i)^\s*$"), re.compile(r"(?i)^N/A$")]
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return FAILED
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except Exception:
+        return FAILED
+
+
+def is_missing(value):
+    return bool(pd.isna(value) or str(value).strip() == "")
+
+
+def add_18_years(dob):
+    """dob.replace(year=dob.year + 18), or FAILED when that date does not exist (29 February)"""
+    try:
+        return dob.replace(year=dob.year + 18)
+    except Exception:
+        return FAILED
+
+
+def cdl_type_issue(value):
+    cdl_type = str(value).strip().upper()
+    if cdl_type and cdl_type not in ALLOWED_CDL_TYPES:
+        return f"Unexpected CDL Type '{cdl_type}'"
+    return None
+
+
+def cdl_number_issue(value):
+    cdl_num = str(value).strip()
+    if cdl_num and not cdl_num.replace("-", "").isalnum():
+        return "CDL Number not alphanumeric"
+    return None
+
+
+def cell_kind(value):
+    """0 for text, 1 for a blank pandas turns into NaN in text rows, 2 for anything else"""
+    if isinstance(value, str):
+        return 0
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return 1
+    return 2
+
+
+class RowView:
+    """Cell values of a frame as df.iterrows() hands them to the checks.
+
+    iterrows() builds each row from df.values and lets pandas infer the row's
+    dtype, so a row made only of text and blanks becomes a string row whose
+    blanks all read as NaN (str() gives "nan" rather than "None" or "<NA>").
+    """
+
+    def __init__(self, df):
+        self.columns = df.columns
+        self.cells = df.values
+        self.text_rows = None
+        if self.cells.dtype == object and self.cells.shape[1]:
+            kinds = np.column_stack([map_values(self.cells[:, i].tolist(), cell_kind).astype(np.int8)
+                                     for i in range(self.cells.shape[1])])
+            self.text_rows = (kinds == 0).any(axis=1) & (kinds != 2).all(axis=1)
+
+    def get(self, name):
+        """Values of a QC column as a list, or None when the column is absent"""
+        if name not in self.columns:
+            return None
+        loc = self.columns.get_loc(name)
+        if not isinstance(loc, int):
+            raise ValueError(f"Duplicate '{name}' columns; QC needs exactly one of each")
+        values = self.cells[:, loc].tolist()
+        if self.text_rows is not None:
+            for i in np.flatnonzero(self.text_rows):
+                if values[i] is None or values[i] is pd.NA:
+                    values[i] = np.nan
+        return values
+
+
+def carry_forward(values, ok, initial=FAILED):
+    """Each row's most recent ok value at or before it, or initial before the first"""
+    last = np.where(ok, np.arange(len(values)), -1)
+    np.maximum.accumulate(last, out=last)
+    carried = np.empty(len(values), dtype=object)
+    carried[:] = initial
+    seen = last >= 0
+    carried[seen] = values[last[seen]]
+    return carried
+
+
+def object_compare(left, right, op):
+    """Element-wise Python comparison of two object arrays as a bool array"""
+    return np.array([op(a, b) for a, b in zip(left, right)], dtype=bool)
+
+
+class QCContext:
+    """A frame prepared for the rules, with parsed columns computed once and shared between rules.
+
+    state carries values from one chunk of a sheet to the next (see stream_qc),
+    including the DateParser whose memo all date columns share, and known
+    pre-fills derived values computed elsewhere (see run_qc's cache).
+    """
+
+    def __init__(self, df, today, state=None, known=None):
+        self.n = len(df)
+        self.today = today
+        self.rows = RowView(df)
+        self.cache = dict(known or {})
+        self.state = {} if state is None else state
+        self.date_parser = self.state.setdefault("date_parser", DateParser())
+
+    def memo(self, key, compute):
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def values(self, name):
+        """Raw values of a column, or None when the sheet lacks it"""
+        return self.memo(("values", name), lambda: self.rows.get(name))
+
+    def parsed(self, name, func, missing=None):
+        """func applied to a column (once per distinct value), or all `missing` when the sheet lacks it"""
+        def compute():
+            values = self.values(name)
+            if values is None:
+                out = np.empty(self.n, dtype=object)
+                out[:] = missing
+                return out
+            return map_values(values, func)
+        return self.memo(("parsed", name, func), compute)
+
+    def dates(self, name):
+        """parse_date of every cell in a column (None throughout when the sheet lacks it)"""
+        def compute():
+            values = self.values(name)
+            return self.none() if values is None else self.date_parser.parse(values)
+        return self.memo(("dates", name), compute)
+
+    def none(self):
+        out = np.empty(self.n, dtype=object)
+        out[:] = None
+        return out
+
+
+class QCRule:
+    """A registered check: deducts points from every row where check(ctx) hits"""
+
+    __slots__ = ("name", "points", "columns", "check")
+
+    def __init__(self, name, points, columns, check):
+        self.name = name
+        self.points = points
+        self.columns = tuple(columns)
+        self.check = check
+
+
+RULES = []
+
+
+def qc_rule(name, points, columns=()):
+    """Register a check run by run_qc, in registration order.
+
+    The check gets a QCContext and returns (hits, message, evaluated): a bool
+    array over the rows, the issue text as one string or an object array
+    (None where there is no hit), and how many rows it actually examined.
+    columns lists every sheet column the check reads, so cached row results
+    are reused only while those cells are unchanged.
+    """
+    def register(check):
+        RULES.append(QCRule(name, points, columns, check))
+        return check
+    return register
+
+
+def dob_dates(ctx):
+    return ctx.dates("Date of Birth")
+
+
+def ages(ctx):
+    """Parsed Age per row (FAILED where int() raised) and the mask of rows that parsed"""
+    def compute():
+        age = ctx.parsed("Age", parse_int, missing=FAILED)
+        return age, age != FAILED
+    return ctx.memo("ages", compute)
+
+
+def carried_ages(ctx):
+    """Last Age that parsed on or before each row, continuing from the previous chunk"""
+    def compute():
+        age, has_age = ages(ctx)
+        carried = carry_forward(age, has_age, ctx.state.get("age", FAILED))
+        if ctx.n:
+            ctx.state["age"] = carried[-1]
+        return carried
+    return ctx.memo("carried_age", compute)
+
+
+def adult_dates(ctx):
+    """18th birthday per row with a DOB; FAILED when it does not exist"""
+    def compute():
+        dob = dob_dates(ctx)
+        has_dob = pd.notna(dob)
+        adult = ctx.none()
+        adult[has_dob] = map_values(dob[has_dob].tolist(), add_18_years)
+        return adult
+    return ctx.memo("adult", compute)
+
+
+def hire_dates(ctx):
+    """Hire Date per row, dropped when the 18th birthday cannot be computed"""
+    def compute():
+        hire = ctx.dates("Hire Date").copy()
+        hire[pd.notna(dob_dates(ctx)) & (adult_dates(ctx) == FAILED)] = None
+        return hire
+    return ctx.memo("hire", compute)
+
+
+def required_field_rule(field):
+    def check(ctx):
+        if ctx.values(field) is None:
+            return np.ones(ctx.n, dtype=bool), f"{field} missing", ctx.n
+        return ctx.parsed(field, is_missing).astype(bool), f"{field} missing", ctx.n
+    return check
+
+
+for required_field in REQUIRED_FIELDS:
+    qc_rule(f"{required_field} missing", 10, [required_field])(required_field_rule(required_field))
+
+
+@qc_rule("DOB in the future", 15, ["Date of Birth"])
+def dob_in_future(ctx):
+    dob = dob_dates(ctx)
+    has_dob = pd.notna(dob)
+    future = np.zeros(ctx.n, dtype=bool)
+    future[has_dob] = object_compare(dob[has_dob], [ctx.today] * int(has_dob.sum()), lambda a, b: a >= b)
+    return future, "DOB is in the future", int(has_dob.sum())
+
+
+@qc_rule("Age mismatch", 15, ["Age", "Date of Birth"])
+def age_mismatch(ctx):
+    dob = dob_dates(ctx)
+    age, has_age = ages(ctx)
+    both = has_age & pd.notna(dob)
+    expected = np.empty(ctx.n, dtype=object)
+    expected[both] = [(ctx.today - d).days // 365 for d in dob[both]]
+    mismatch = np.zeros(ctx.n, dtype=bool)
+    mismatch[both] = np.abs(expected[both] - age[both]) > 1
+    messages = np.empty(ctx.n, dtype=object)
+    messages[mismatch] = [f"Age mismatch (expected ~{e}, got {a})" for e, a in zip(expected[mismatch], age[mismatch])]
+    return mismatch, messages, int(both.sum())
+
+
+@qc_rule("Experience too high", 10, ["Years of Experience", "Age"])
+def experience_too_high(ctx):
+    # Like the original row loop, compares against the last Age that parsed on or before the row
+    exp = ctx.parsed("Years of Experience", parse_float, missing=FAILED)
+    carried_age = carried_ages(ctx)
+    checkable = (exp != FAILED) & (carried_age != FAILED)
+    too_high = np.zeros(ctx.n, dtype=bool)
+    too_high[checkable] = object_compare(exp[checkable], carried_age[checkable] - 18, lambda a, b: a > b)
+    messages = np.empty(ctx.n, dtype=object)
+    messages[too_high] = [f"Experience too high for age {a}" for a in carried_age[too_high]]
+    return too_high, messages, int(checkable.sum())
+
+
+@qc_rule("Hire before 18", 20, ["Hire Date", "Date of Birth"])
+def hire_before_18(ctx):
+    hire = hire_dates(ctx)
+    adult = adult_dates(ctx)
+    comparable = pd.notna(hire) & pd.notna(dob_dates(ctx))
+    early = np.zeros(ctx.n, dtype=bool)
+    early[comparable] = object_compare(hire[comparable], adult[comparable], lambda a, b: a < b)
+    return early, "Hire before legal age (18)", int(comparable.sum())
+
+
+@qc_rule("Tenure mismatch", 5, ["Years of Tenure", "Hire Date", "Date of Birth"])
+def tenure_mismatch(ctx):
+    hire = hire_dates(ctx)
+    tenure = ctx.parsed("Years of Tenure", parse_float, missing=FAILED)
+    both = pd.notna(hire) & (tenure != FAILED)
+    expected = np.zeros(ctx.n, dtype=np.float64)
+    expected[both] = map_values(hire[both].tolist(), lambda h: (ctx.today - h).days / 365.25).astype(np.float64)
+    actual = np.zeros(ctx.n, dtype=np.float64)
+    actual[both] = tenure[both].astype(np.float64)
+    mismatch = np.zeros(ctx.n, dtype=bool)
+    mismatch[both] = np.abs(expected[both] - actual[both]) > 1
+    messages = np.empty(ctx.n, dtype=object)
+    messages[mismatch] = [
+        f"Tenure mismatch (expected ~{e:.2f}, got {t})" for e, t in zip(expected[mismatch].tolist(), tenure[mismatch])
+    ]
+    return mismatch, messages, int(both.sum())
+
+
+@qc_rule("License expired", 20, ["Expiration Date"])
+def license_expired(ctx):
+    expiry = ctx.dates("Expiration Date")
+    has_expiry = pd.notna(expiry)
+    expired = np.zeros(ctx.n, dtype=bool)
+    expired[has_expiry] = object_compare(expiry[has_expiry], [ctx.today] * int(has_expiry.sum()), lambda a, b: a < b)
+    messages = np.empty(ctx.n, dtype=object)
+    messages[expired] = [f"License expired on {d}" for d in expiry[expired]]
+    return expired, messages, int(has_expiry.sum())
+
+
+@qc_rule("Unexpected CDL Type", 5, ["CDL Type"])
+def unexpected_cdl_type(ctx):
+    messages = ctx.parsed("CDL Type", cdl_type_issue)
+    return pd.notna(messages), messages, ctx.n if ctx.values("CDL Type") is not None else 0
+
+
+@qc_rule("CDL Number not alphanumeric", 5, ["CDL Number"])
+def cdl_number_not_alphanumeric(ctx):
+    messages = ctx.parsed("CDL Number", cdl_number_issue)
+    return pd.notna(messages), messages, ctx.n if ctx.values("CDL Number") is not None else 0
+
+
+def is_blank_text(value):
+    return isinstance(value, str) and any(pattern.search(value) for pattern in BLANK_PATTERNS)
+
+
+def prepare_frame(df):
+    """Strip column names and blank out empty and N/A cells, in place.
+
+    Same result as df.replace(regex=...) with BLANK_PATTERNS, but each
+    distinct text value is matched once.
+    """
+    df.columns = [str(col).strip() for col in df.columns]
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if not (column.dtype == object or pd.api.types.is_string_dtype(column)):
+            continue
+        blank = map_values(column.tolist(), is_blank_text).astype(bool)
+        if blank.any():
+            df.isetitem(i, column.mask(blank, pd.NA))
+
+
+def score_rows(df, today, rule_stats=None, rules=None, state=None, known=None):
+    """Deductions, QC tags and QC issue text for each row of a prepared frame.
+
+    Each registered rule is evaluated column-wise: every distinct cell value
+    is parsed once and the deductions are combined as masks, giving the same
+    results as checking row by row. rules defaults to every registered rule.
+    If rule_stats is a dict, each rule's wall time, rows evaluated and hit
+    count are added to rule_stats[rule name].
+    """
+    n = len(df)
+    ctx = QCContext(df, today, state, known)
+
+    deductions = np.zeros(n, dtype=np.int64)
+    row_messages = []
+    for rule in RULES if rules is None else rules:
+        started = time.perf_counter()
+        hits, message, evaluated = rule.check(ctx)
+        hits = np.asarray(hits, dtype=bool)
+        if isinstance(message, str):
+            column = np.empty(n, dtype=object)
+            column[hits] = message
+            message = column
+        if rule_stats is not None:
+            stats = rule_stats.setdefault(rule.name, {"points": rule.points, "seconds": 0.0, "rows": 0, "hits": 0})
+            stats["seconds"] += time.perf_counter() - started
+            stats["rows"] += evaluated
+            stats["hits"] += int(hits.sum())
+        deductions += rule.points * hits
+        row_messages.append(message)
+
+    scores = 100 - deductions
+    issues = ["; ".join(m for m in parts if m is not None) or "OK" for parts in zip(*row_messages)]
+    if not row_messages:
+        issues = ["OK"] * n
+    tags = np.select([scores >= 90, scores >= 75], ["✅ Valid", "⚠️ Partial"], "❌ High Risk").tolist()
+    return deductions, tags, issues
+
+
+def cell_token(value):
+    return f"{type(value).__name__}:{value!r}"
+
+
+def row_fingerprints(ctx, rules):
+    """SHA-1 per row of everything its QC result depends on.
+
+    Covers the cells of every column the rules read, whether pandas reads
+    the row as text, the Age carried in from earlier rows, today's date and
+    the rule set itself.
+    """
+    columns = sorted({col for rule in rules for col in rule.columns})
+    signature = repr((RULES_VERSION, ctx.today.isoformat(), [(r.name, r.points, r.columns) for r in rules]))
+    parts = []
+    for col in columns:
+        values = ctx.values(col)
+        parts.append(["-"] * ctx.n if values is None else map_values(values, cell_token))
+    text_rows = ctx.rows.text_rows
+    parts.append(["-"] * ctx.n if text_rows is None else text_rows.tolist())
+    parts.append(["-" if age is FAILED else repr(age) for age in carried_ages(ctx)])
+    return [hashlib.sha1("\x1f".join(map(str, (signature, *row))).encode()).digest() for row in zip(*parts)]
+
+
+def score_rows_cached(df, today, cache, rule_stats=None, rules=None):
+    """score_rows that reuses results from a QCRowCache and evaluates only rows it has not seen.
+
+    Changed rows are scored as one smaller frame, given the Age they carry in
+    from the full sheet, so results are the same as scoring everything.
+    Fingerprinting a row costs about as much as the column-wise rules spend
+    on it, so this only pays off for much more expensive rule sets; QC Radar
+    scores sheets without a cache.
+    """
+    rules = RULES if rules is None else rules
+    n = len(df)
+    ctx = QCContext(df, today)
+    fingerprints = row_fingerprints(ctx, rules)
+    known = cache.lookup(fingerprints)
+    todo = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in known]
+    deductions = np.zeros(n, dtype=np.int64)
+    tags = [None] * n
+    issues = [None] * n
+    for i, fingerprint in enumerate(fingerprints):
+        if fingerprint in known:
+            deductions[i], tags[i], issues[i] = known[fingerprint]
+    if todo:
+        changed = df.iloc[todo].reset_index(drop=True)
+        carried = carried_ages(ctx)[todo]
+        fresh_deductions, fresh_tags, fresh_issues = score_rows(
+            changed, today, rule_stats, rules, known={"carried_age": carried}
+        )
+        fresh = {}
+        for j, i in enumerate(todo):
+            deductions[i], tags[i], issues[i] = fresh_deductions[j], fresh_tags[j], fresh_issues[j]
+            fresh[fingerprints[i]] = (int(fresh_deductions[j]), fresh_tags[j], fresh_issues[j])
+        cache.store(fresh)
+    cache.hits += n - len(todo)
+    cache.misses += len(todo)
+    return deductions, tags, issues
+
+
+def tag_counts_for(deductions):
+    scores = 100 - deductions
+    return {
+        "valid": int((scores >= 90).sum()),
+        "partial": int(((scores >= 75) & (scores < 90)).sum()),
+        "fail": int((scores < 75).sum()),
+    }
+
+
+def confidence_score(total_deductions, rows):
+    total_possible = 100 * rows
+    return round((1 - (total_deductions / total_possible)) * 100, 2)
+
+
+def run_qc(df: pd.DataFrame, rule_stats=None, rules=None, cache=None):
+    """Score each driver row of an HDVI sheet; returns (qc_df, confidence, tag_counts).
+
+    See score_rows for rules and rule_stats. With a QCRowCache, rows whose
+    fingerprint was scored earlier today reuse that result.
+    """
+    prepare_frame(df)
+    if cache is None:
+        deductions, tags, issues = score_rows(df, date.today(), rule_stats, rules)
+    else:
+        deductions, tags, issues = score_rows_cached(df, date.today(), cache, rule_stats, rules)
+    tag_counts = tag_counts_for(deductions)
+    confidence = confidence_score(int(deductions.sum()), len(df))
+    n = len(df)
+
+    qc_df = df.copy().reset_index(drop=True)
+    results = pd.DataFrame({"QC Tag": tags, "QC Issues": issues}) if n else pd.DataFrame([])
+    qc_df = pd.concat([qc_df, results], axis=1)
+
+    return qc_df, confidence, tag_counts
+
+
+def rule_profile(rule_stats):
+    """rule_stats as a table, slowest rule first"""
+    profile = pd.DataFrame([{"Rule": name, **stats} for name, stats in rule_stats.items()],
+                           columns=["Rule", "points", "seconds", "rows", "hits"])
+    profile = profile.rename(columns={"points": "Points", "seconds": "Seconds", "rows": "Rows Evaluated", "hits": "Hits"})
+    return profile.sort_values("Seconds", ascending=False, ignore_index=True)
+
+
+def hdvi_frame(raw_df):
+    """Driver rows of an HDVI sheet read with header=None: names from the second row, stripped"""
+    raw_df.columns = raw_df.iloc[HEADER_ROW]
+    df = raw_df[HEADER_ROW + 1:].reset_index(drop=True)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def normalize_mvr_received(df):
+    """Upper-case and strip MVR Received in place, as the count check and the report show it"""
+    df["MVR Received"] = df["MVR Received"].astype(str).str.upper().str.strip()
+
+
+def mvr_counts(labels):
+    """(TRUE, FALSE) counts of MVR Received labels, read the way QC Radar normalizes them"""
+    labels = pd.Series(labels, dtype=object).astype(str).str.upper().str.strip()
+    return int((labels == "TRUE").sum()), int((labels == "FALSE").sum())
+
+
+def scan_hdvi(source, sheet_name=HDVI_SHEET):
+    """One streamed pass over an HDVI sheet, holding a single column in memory.
+
+    Returns the sheet width and number of data rows as pandas would read
+    them, plus the raw MVR Received values (None when there is no such
+    column) for the count check.
+    """
+    width = 0
+    last_row = -1
+    mvr_pos = None
+    labels = []
+    for i, row in enumerate(iter_values(source, sheet_name)):
+        if has_data(row):
+            last_row = i
+        filled = len(row)
+        while filled and row[filled - 1] in (None, ""):
+            filled -= 1
+        width = max(width, filled)
+        if i == HEADER_ROW:
+            names = [str(excel_value(value)).strip() for value in row]
+            mvr_pos = names.index("MVR Received") if "MVR Received" in names else None
+        elif i > HEADER_ROW and mvr_pos is not None:
+            labels.append(excel_value(row[mvr_pos]) if mvr_pos < len(row) else "")
+    rows = max(last_row - HEADER_ROW, 0)
+    return {"width": width, "rows": rows, "mvr_received": labels[:rows] if mvr_pos is not None else None}
+
+
+def report_value(value):
+    """Cell value for the write-only report; blanks become empty cells"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def stream_qc(source, report_path, width, rows, sheet_name=HDVI_SHEET, chunk_rows=CHUNK_ROWS, rule_stats=None):
+    """QC an HDVI sheet chunk by chunk, appending report rows to a write-only workbook at report_path.
+
+    width and rows come from scan_hdvi. Each chunk is parsed, prepared and
+    scored like the whole sheet in run_qc (the last parsed Age carries over
+    between chunks), so memory stays bounded by chunk_rows while the
+    confidence and tag counts match run_qc. Returns (confidence, tag_counts,
+    preview) where preview holds the QC Tag and QC Issues of the first
+    PREVIEW_ROWS rows.
+    """
+    if rows <= 0:
+        raise ValueError(f"No driver rows found in '{sheet_name}'")
+    today = date.today()
+    state = {}
+    totals = {"chunks": 0, "deductions": 0, "valid": 0, "partial": 0, "fail": 0}
+    preview = []
+    prefix = []
+    chunk = []
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+
+    def flush():
+        df = hdvi_frame(TextParser(prefix + chunk, header=None, skip_blank_lines=False).read())
+        if "MVR Received" in df.columns:
+            normalize_mvr_received(df)
+        prepare_frame(df)
+        deductions, tags, issues = score_rows(df, today, rule_stats, state=state)
+        if not totals["chunks"]:
+            ws.append(list(df.columns) + ["QC Tag", "QC Issues"])
+        for values, tag, issue in zip(df.itertuples(index=False, name=None), tags, issues):
+            ws.append([report_value(value) for value in values] + [tag, issue])
+        for key, count in tag_counts_for(deductions).items():
+            totals[key] += count
+        totals["deductions"] += int(deductions.sum())
+        totals["chunks"] += 1
+        preview.extend(zip(tags, issues))
+        del preview[PREVIEW_ROWS:]
+        chunk.clear()
+
+    for i, row in enumerate(iter_values(source, sheet_name)):
+        if i > HEADER_ROW + rows:
+            break
+        values = [excel_value(value) for value in row[:width]]
+        values += [""] * (width - len(values))
+        if i <= HEADER_ROW:
+            prefix.append(values)
+            continue
+        chunk.append(values)
+        if len(chunk) == chunk_rows:
+            flush()
+    if chunk:
+        flush()
+    wb.save(report_path)
+    tag_counts = {key: totals[key] for key in ("valid", "partial", "fail")}
+    confidence = confidence_score(totals["deductions"], rows)
+    return confidence, tag_counts, pd.DataFrame(preview, columns=["QC Tag", "QC Issues"])
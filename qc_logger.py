@@ -1,23 +1,56 @@
-import pandas as pd
-from datetime import datetime
-
-def process_qc_submission(user, task_type, confidence, data_path="task_data.csv"):
-    """Logs a QC submission with autogenerated TaskID."""
-    try:
-        df = pd.read_csv(data_path)
-    except FileNotFoundError:
-        df = pd.DataFrame(columns=["UserID", "TaskID", "TaskType", "SubmissionTime", "QC_Passed", "QC_Total"])
-
-    next_id = f"TASK{len(df) + 1:03d}"
-    new_task = {
-        "UserID": user,
-        "TaskID": next_id,
-        "TaskType": task_type,
-        "SubmissionTime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "QC_Passed": round(confidence, 2),
-        "QC_Total": 100
-    }
-
-    df = pd.concat([df, pd.DataFrame([new_task])], ignore_index=True)
-    df.to_csv(data_path, index=False)
-    return new_task
\ No newline at end of file
+import atexit
+import os
+import threading
+
+from task_store import LEGACY_CSV_PATH, TASK_DB_PATH, TaskWriter
+
+writers = {}
+writers_lock = threading.Lock()
+
+
+def task_writer(data_path=TASK_DB_PATH):
+    """The process-wide TaskWriter for a store, started on first use and drained at exit"""
+    # Keyed by pid: a forked child inherits the parent's writer without its
+    # thread and would hand out the parent's reserved ids again
+    key = (os.getpid(), data_path)
+    with writers_lock:
+        if key not in writers:
+            # Only the app's own store takes over the old logger's CSV
+            writer = TaskWriter(data_path, legacy_csv=LEGACY_CSV_PATH if data_path == TASK_DB_PATH else None)
+            atexit.register(writer.close)
+            writers[key] = writer
+        return writers[key]
+
+
+def process_qc_submission(user, task_type, confidence, data_path=TASK_DB_PATH):
+    """Logs a QC submission with autogenerated TaskID; the write happens in the background.
+
+    Raises RuntimeError instead of handing out a TaskID when the writer
+    thread has stopped, since nothing would ever write the task.
+    """
+    writer = task_writer(data_path)
+    if not writer.thread.is_alive():
+        raise RuntimeError(f"The QC task writer for {data_path} has stopped; the submission was not logged")
+    return writer.submit(user, task_type, round(confidence, 2), qc_total=100)
+
+
+def submission_error(data_path=TASK_DB_PATH):
+    """Why some of this process's submissions are not in the store yet, or None when they all are"""
+    writer = writers.get((os.getpid(), data_path))
+    return writer.error if writer else None
+
+
+def flush_submissions(data_path=TASK_DB_PATH, timeout=5):
+    """Wait for this process's queued submissions to reach the store.
+
+    Returns None when everything submitted so far is stored, else a message
+    saying what is not: submissions still queued after timeout, or ones the
+    writer had to set aside (see submission_error).
+    """
+    writer = writers.get((os.getpid(), data_path))
+    if writer is None:
+        return None
+    if not writer.flush(timeout):
+        waiting = f"{writer.submitted - writer.written} QC submissions are still waiting to be written to {data_path}."
+        return " ".join(filter(None, [waiting, writer.error]))
+    return writer.error
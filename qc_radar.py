@@ -1,126 +1,49 @@
 import streamlit as st
-import pandas as pd
-from datetime import date
+import os
+import tempfile
 from io import BytesIO
-from qc_logger import process_qc_submission
+from qc_batch import run_batch
+from qc_engine import (
+    HDVI_SHEET, hdvi_frame, mvr_counts, normalize_mvr_received, rule_profile, run_qc, scan_hdvi, stream_qc
+)
+from qc_logger import process_qc_submission, submission_error
+from workbook_cache import read_excel
 
 def qc_radar_app():
     st.markdown('<div class="custom-heading">Knock knock! Your HDVI MVR wants to be validated 👀</div>', unsafe_allow_html=True)
     st.write("Upload an MVR Excel file to validate.")
 
-    def run_qc(df: pd.DataFrame):
-        today = date.today()
-        df.columns = [str(col).strip() for col in df.columns]
-        df.replace(regex={r"(?i)^\s*$": pd.NA, r"(?i)^N/A$": pd.NA}, inplace=True)
-
-        required_fields = [
-            "First Name", "Last Name", "Date of Birth", "Age",
-            "Years of Experience", "Hire Date", "Years of Tenure",
-            "License State", "CDL Number", "CDL Type", "Expiration Date"
-        ]
-        allowed_cdl_types = {"A", "B", "C"}
-
-        results = []
-        tag_counts = {"valid": 0, "partial": 0, "fail": 0}
-        total_deductions = 0
-
-        for idx, row in df.iterrows():
-            issues = []
-            score = 100
-
-            def deduct(points, reason):
-                nonlocal score
-                score -= points
-                issues.append(reason)
-
-            for field in required_fields:
-                if pd.isna(row.get(field)) or str(row.get(field)).strip() == "":
-                    deduct(10, f"{field} missing")
-
-            try:
-                dob = pd.to_datetime(row["Date of Birth"], errors="coerce").date()
-                if dob >= today:
-                    deduct(15, "DOB is in the future")
-            except:
-                dob = None
-
-            try:
-                age = int(row["Age"])
-                if dob:
-                    expected_age = (today - dob).days // 365
-                    if abs(expected_age - age) > 1:
-                        deduct(15, f"Age mismatch (expected ~{expected_age}, got {age})")
-            except:
-                pass
-
-            try:
-                exp = float(row["Years of Experience"])
-                if 'age' in locals() and exp > age - 18:
-                    deduct(10, f"Experience too high for age {age}")
-            except:
-                pass
-
-            try:
-                hire = pd.to_datetime(row["Hire Date"], errors="coerce").date()
-                if dob and hire < dob.replace(year=dob.year + 18):
-                    deduct(20, "Hire before legal age (18)")
-            except:
-                hire = None
-
-            try:
-                tenure = float(row["Years of Tenure"])
-                if hire:
-                    expected_tenure = (today - hire).days / 365.25
-                    if abs(expected_tenure - tenure) > 1:
-                        deduct(5, f"Tenure mismatch (expected ~{expected_tenure:.2f}, got {tenure})")
-            except:
-                pass
-
-            try:
-                exp_date = pd.to_datetime(row["Expiration Date"], errors="coerce").date()
-                if exp_date < today:
-                    deduct(20, f"License expired on {exp_date}")
-            except:
-                pass
-
-            cdl_type = str(row.get("CDL Type", "")).strip().upper()
-            if cdl_type and cdl_type not in allowed_cdl_types:
-                deduct(5, f"Unexpected CDL Type '{cdl_type}'")
-
-            cdl_num = str(row.get("CDL Number", "")).strip()
-            if cdl_num and not cdl_num.replace("-", "").isalnum():
-                deduct(5, "CDL Number not alphanumeric")
-
-            if score >= 90:
-                tag = "✅ Valid"
-                tag_counts["valid"] += 1
-            elif score >= 75:
-                tag = "⚠️ Partial"
-                tag_counts["partial"] += 1
-            else:
-                tag = "❌ High Risk"
-                tag_counts["fail"] += 1
-
-            results.append({"QC Tag": tag, "QC Issues": "; ".join(issues) if issues else "OK"})
-            total_deductions += (100 - score)
-
-        total_possible = 100 * len(df)
-        confidence = round((1 - (total_deductions / total_possible)) * 100, 2)
-
-        qc_df = df.copy().reset_index(drop=True)
-        qc_df = pd.concat([qc_df, pd.DataFrame(results)], axis=1)
-
-        return qc_df, confidence, tag_counts
+    if st.checkbox("🗂️ Batch mode (validate many files at once)"):
+        uploads = st.file_uploader("📂 Upload Excel Files", type=["xlsx"], accept_multiple_files=True)
+        if uploads and st.button("🚀 Run Batch QC"):
+            progress_bar = st.progress(0)
+            with st.spinner(f"Validating {len(uploads)} files..."):
+                summary, archive = run_batch(
+                    [(upload.name, upload.getvalue()) for upload in uploads],
+                    progress=lambda done, total: progress_bar.progress(done / total)
+                )
+            st.markdown("### 📊 Batch Summary")
+            st.dataframe(summary, use_container_width=True)
+            st.download_button(
+                label="📥 Download All QC Reports",
+                data=archive,
+                file_name="qc_reports.zip",
+                mime="application/zip"
+            )
+        return
 
     uploaded = st.file_uploader("📂 Upload Excel File", type=["xlsx"])
     if uploaded:
         try:
-            raw_df = pd.read_excel(uploaded, sheet_name="hdvi output", header=None)
-            raw_df.columns = raw_df.iloc[1]
-            df = raw_df[2:].reset_index(drop=True)
-            df.columns = [str(c).strip() for c in df.columns]
+            low_memory = st.checkbox("🚚 Low-memory mode (stream very large files in chunks)")
+            if low_memory:
+                scan = scan_hdvi(uploaded)
+                has_mvr_column = scan["mvr_received"] is not None
+            else:
+                df = hdvi_frame(read_excel(uploaded, sheet_name=HDVI_SHEET, header=None))
+                has_mvr_column = "MVR Received" in df.columns
 
-            if "MVR Received" not in df.columns:
+            if not has_mvr_column:
                 st.error("🚫 'MVR Received' column is missing. Please include it to proceed.")
                 st.stop()
 
@@ -128,9 +51,12 @@ def qc_radar_app():
             expected_true_count = st.number_input("✅ Enter number of drivers expected to have MVRs (TRUE):", min_value=0, max_value=client_driver_count)
 
             if client_driver_count and expected_true_count is not None:
-                df["MVR Received"] = df["MVR Received"].astype(str).str.upper().str.strip()
-                actual_true = (df["MVR Received"] == "TRUE").sum()
-                actual_false = (df["MVR Received"] == "FALSE").sum()
+                if low_memory:
+                    actual_true, actual_false = mvr_counts(scan["mvr_received"])
+                else:
+                    normalize_mvr_received(df)
+                    actual_true = (df["MVR Received"] == "TRUE").sum()
+                    actual_false = (df["MVR Received"] == "FALSE").sum()
                 total_labeled = actual_true + actual_false
 
                 st.markdown("### 🔍 MVR Received Breakdown")
@@ -150,14 +76,31 @@ def qc_radar_app():
 
                 st.success("✅ MVR count validation passed. Proceeding to QC...")
 
-                qc_df, confidence, counts = run_qc(df)
+                rule_stats = {}
+                if low_memory:
+                    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as report:
+                        report_path = report.name
+                    try:
+                        confidence, counts, preview = stream_qc(
+                            uploaded, report_path, scan["width"], scan["rows"], rule_stats=rule_stats
+                        )
+                        with open(report_path, "rb") as report:
+                            buffer = BytesIO(report.read())
+                    finally:
+                        os.remove(report_path)
+                else:
+                    qc_df, confidence, counts = run_qc(df, rule_stats=rule_stats)
+                    preview = qc_df[["QC Tag", "QC Issues"]]
+                    buffer = BytesIO()
+                    qc_df.to_excel(buffer, index=False, engine="openpyxl")
+                    buffer.seek(0)
 
                 st.success(f"✅ QC completed! Confidence Score: **{confidence}%**")
-                st.dataframe(qc_df[["QC Tag", "QC Issues"]], use_container_width=True)
-
-                buffer = BytesIO()
-                qc_df.to_excel(buffer, index=False, engine="openpyxl")
-                buffer.seek(0)
+                if low_memory:
+                    st.caption(f"Showing the first {len(preview)} of {scan['rows']} rows; the report has them all.")
+                st.dataframe(preview, use_container_width=True)
+                with st.expander("⏱️ Rule Profile"):
+                    st.dataframe(rule_profile(rule_stats), use_container_width=True)
 
                 st.download_button(
                     label="📥 Download QC Report",
@@ -183,6 +126,9 @@ def qc_radar_app():
                             confidence=confidence
                         )
                         st.success(f"🎯 Task {result['TaskID']} logged for **{result['UserID']}** — Accuracy: **{confidence}%**")
+                        problem = submission_error()
+                        if problem:
+                            st.error(f"⚠️ {problem}")
                 else:
                     st.warning("🔐 Please login to submit this result.")
 
@@ -0,0 +1,57 @@
+import sqlite3
+from datetime import date
+
+QC_CACHE_PATH = "qc_row_cache.sqlite"
+LOOKUP_CHUNK = 500
+
+
+class QCRowCache:
+    """On-disk memo of per-row QC results (deduction, tag, issues) keyed by row fingerprint.
+
+    Fingerprints already include today's date and the rule set, so entries
+    from earlier days can never be reused and are dropped when the cache is
+    opened. hits and misses count rows reused and re-evaluated since then.
+    """
+
+    def __init__(self, path=QC_CACHE_PATH):
+        self.day = date.today().isoformat()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS qc_rows ("
+                "fingerprint BLOB PRIMARY KEY, day TEXT, deduction INTEGER, tag TEXT, issues TEXT)"
+            )
+            self.conn.execute("DELETE FROM qc_rows WHERE day != ?", (self.day,))
+
+    def lookup(self, fingerprints):
+        """Known results as {fingerprint: (deduction, tag, issues)}"""
+        known = {}
+        unique = list(set(fingerprints))
+        for start in range(0, len(unique), LOOKUP_CHUNK):
+            chunk = unique[start:start + LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT fingerprint, deduction, tag, issues FROM qc_rows "
+                f"WHERE fingerprint IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for fingerprint, deduction, tag, issues in rows:
+                known[fingerprint] = (deduction, tag, issues)
+        return known
+
+    def store(self, results):
+        """Save {fingerprint: (deduction, tag, issues)} for freshly evaluated rows"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO qc_rows (fingerprint, day, deduction, tag, issues) VALUES (?, ?, ?, ?, ?)",
+                [(fingerprint, self.day, *result) for fingerprint, result in results.items()]
+            )
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM qc_rows")
+
+    def close(self):
+        self.conn.close()
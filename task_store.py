@@ -0,0 +1,510 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TASK_DB_PATH = "task_data.sqlite"
+LEGACY_CSV_PATH = "task_data.csv"
+TASK_COLUMNS = ["UserID", "TaskID", "TaskType", "SubmissionTime", "QC_Passed", "QC_Total"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BATCH_SIZE = 100
+RETRY_SECONDS = 1.0
+MAX_RETRIES = 3  # further attempts at a batch after the store reports it locked or unavailable
+FAILED_SUFFIX = ".failed.jsonl"  # next to the store: batches a TaskWriter could not write, replayed later
+# Shift day of a SubmissionTime: the QC shift runs 6:30 PM to 3:30 AM and
+# belongs to the day it starts on; NULL outside the shift
+SHIFT_DATE_SQL = (
+    "CASE WHEN substr({col}, 12) >= '18:30' THEN date({col}) "
+    "WHEN substr({col}, 12) <= '03:30:00' THEN date({col}, '-1 day') END"
+)
+ROLLUP_TABLES = {
+    "user_rollup": (
+        "CREATE TABLE user_rollup (UserID TEXT PRIMARY KEY, first_id INTEGER, tasks INTEGER, "
+        "passed_sum REAL, passed_count INTEGER, last_submission TEXT)"
+    ),
+    "shift_rollup": (
+        "CREATE TABLE shift_rollup (UserID TEXT, shift_date TEXT, tasks INTEGER, passed_sum REAL, "
+        "passed_count INTEGER, PRIMARY KEY (UserID, shift_date))"
+    ),
+}
+# Bumped on every insert so readers can tell when cached views are stale
+VERSION_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS tasks_version AFTER INSERT ON tasks
+BEGIN
+    UPDATE store_version SET version = version + 1;
+END
+"""
+ROLLUP_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS tasks_rollup AFTER INSERT ON tasks WHEN NEW.UserID IS NOT NULL
+BEGIN
+    INSERT OR IGNORE INTO user_rollup VALUES (NEW.UserID, NEW.id, 0, 0, 0, NULL);
+    UPDATE user_rollup SET
+        first_id = min(first_id, NEW.id),
+        tasks = tasks + 1,
+        passed_sum = passed_sum + coalesce(NEW.QC_Passed, 0),
+        passed_count = passed_count + (NEW.QC_Passed IS NOT NULL),
+        last_submission = CASE WHEN last_submission IS NULL OR NEW.SubmissionTime > last_submission
+                               THEN coalesce(NEW.SubmissionTime, last_submission) ELSE last_submission END
+    WHERE UserID = NEW.UserID;
+    INSERT OR IGNORE INTO shift_rollup
+        SELECT NEW.UserID, {SHIFT_DATE_SQL.format(col="NEW.SubmissionTime")}, 0, 0, 0
+        WHERE {SHIFT_DATE_SQL.format(col="NEW.SubmissionTime")} IS NOT NULL;
+    UPDATE shift_rollup SET
+        tasks = tasks + 1,
+        passed_sum = passed_sum + coalesce(NEW.QC_Passed, 0),
+        passed_count = passed_count + (NEW.QC_Passed IS NOT NULL)
+    WHERE UserID = NEW.UserID AND shift_date = {SHIFT_DATE_SQL.format(col="NEW.SubmissionTime")};
+END
+"""
+
+
+# Store files whose schema this process has already set up (see TaskStore),
+# and (path, legacy_csv) pairs prepare_store has already seeded
+prepared_paths = set()
+seeded_stores = set()
+prepared_lock = threading.Lock()
+
+
+def task_id(number):
+    return f"TASK{number:03d}"
+
+
+class TaskStore:
+    """Append-only log of submitted QC tasks in SQLite.
+
+    Each submission is a single INSERT, so its cost does not grow with
+    history, and WAL mode lets the dashboard read while QA users write.
+    TaskIDs come from an AUTOINCREMENT key allocated inside the insert's
+    transaction, so concurrent submitters never share one. An insert
+    trigger keeps per-user and per-user-per-shift-day rollups current, so
+    the dashboard's aggregates never scan the task history.
+
+    The schema is set up the first time a process opens a path; later opens
+    only connect. A read_only store skips setup and refuses writes, for
+    pages that only read a store prepare_store has already set up.
+    """
+
+    def __init__(self, path=TASK_DB_PATH, check_same_thread=True, read_only=False):
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=check_same_thread)
+        if read_only:
+            self.conn.execute("PRAGMA query_only=ON")
+            return
+        key = os.path.abspath(path)
+        with prepared_lock:
+            if key not in prepared_paths:
+                self.create_schema()
+                prepared_paths.add(key)
+
+    def create_schema(self):
+        """Create missing tables, indexes and triggers, building the rollups if the store predates them"""
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, UserID TEXT, TaskID TEXT, TaskType TEXT, "
+                "SubmissionTime TEXT, QC_Passed REAL, QC_Total INTEGER)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_task_id ON tasks (TaskID)")
+            # Covers the dashboard's per-user queries, so they read only that user's index entries
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_user_time ON tasks (UserID, SubmissionTime, QC_Passed, TaskID)"
+            )
+            existing = {name for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table, ddl in ROLLUP_TABLES.items():
+                if table not in existing:
+                    self.conn.execute(ddl)
+            self.conn.execute(ROLLUP_TRIGGER)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS store_version (version INTEGER)")
+            self.conn.execute("INSERT INTO store_version SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM store_version)")
+            self.conn.execute(VERSION_TRIGGER)
+            if not set(ROLLUP_TABLES) <= existing:
+                self.rebuild_rollups()
+
+    def rebuild_rollups(self):
+        """Recompute the rollup tables from the task history (for stores written before they existed)"""
+        shift = SHIFT_DATE_SQL.format(col="SubmissionTime")
+        with self.conn:
+            self.conn.execute("DELETE FROM user_rollup")
+            self.conn.execute("DELETE FROM shift_rollup")
+            self.conn.execute(
+                "INSERT INTO user_rollup SELECT UserID, MIN(id), COUNT(*), coalesce(SUM(QC_Passed), 0), "
+                "COUNT(QC_Passed), MAX(SubmissionTime) FROM tasks WHERE UserID IS NOT NULL GROUP BY UserID"
+            )
+            self.conn.execute(
+                f"INSERT INTO shift_rollup SELECT UserID, {shift} AS shift_date, COUNT(*), coalesce(SUM(QC_Passed), 0), "
+                f"COUNT(QC_Passed) FROM tasks WHERE UserID IS NOT NULL AND shift_date IS NOT NULL "
+                f"GROUP BY UserID, shift_date"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, user, task_type, qc_passed, qc_total=100, submitted=None):
+        """Log one task and return it as a dict with its new TaskID"""
+        task = {
+            "UserID": user,
+            "TaskType": task_type,
+            "SubmissionTime": (submitted or datetime.now()).strftime(TIME_FORMAT),
+            "QC_Passed": qc_passed,
+            "QC_Total": qc_total,
+        }
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO tasks (UserID, TaskType, SubmissionTime, QC_Passed, QC_Total) VALUES (?, ?, ?, ?, ?)",
+                (user, task_type, task["SubmissionTime"], qc_passed, qc_total)
+            )
+            task["TaskID"] = task_id(cursor.lastrowid)
+            self.conn.execute("UPDATE tasks SET TaskID = ? WHERE id = ?", (task["TaskID"], cursor.lastrowid))
+        return {col: task[col] for col in TASK_COLUMNS}
+
+    def reserve_ids(self, count):
+        """Claim count consecutive task ids that no other writer or append() will use; returns the first"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tasks'").fetchone()
+            start = (row[0] if row else 0) + 1
+            if row:
+                self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'tasks'", (start + count - 1,))
+            else:
+                self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', ?)", (start + count - 1,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return start
+
+    def insert_tasks(self, tasks):
+        """Write (id, task) pairs with ids from reserve_ids in one transaction"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO tasks (id, UserID, TaskID, TaskType, SubmissionTime, QC_Passed, QC_Total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(number, *(task[col] for col in TASK_COLUMNS)) for number, task in tasks]
+            )
+
+    def restore_tasks(self, tasks):
+        """Write (id, task) pairs set aside by a TaskWriter, skipping ids already stored; returns rows written"""
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (id, UserID, TaskID, TaskType, SubmissionTime, QC_Passed, QC_Total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(number, *(task.get(col) for col in TASK_COLUMNS)) for number, task in tasks]
+            )
+        return cursor.rowcount
+
+    def import_csv(self, csv_path=LEGACY_CSV_PATH):
+        """Copy a task_data.csv written by the old logger into an empty store; returns rows imported.
+
+        Rows keep their TaskID, even where the old len()-based numbering
+        repeated one; rows without one get a new TaskID. Columns the CSV
+        lacks are left empty. A store that already holds tasks is left
+        alone, so importing twice never duplicates history.
+        """
+        legacy = pd.read_csv(csv_path, dtype=str, keep_default_na=False).reindex(columns=TASK_COLUMNS, fill_value="")
+        # Store times in TIME_FORMAT, which the rollups and time filters compare as text
+        times = pd.to_datetime(legacy["SubmissionTime"].replace("", None), format="mixed", errors="coerce")
+        legacy["SubmissionTime"] = times.dt.strftime(TIME_FORMAT).fillna("")
+        rows = [
+            (
+                row.UserID or None, row.TaskID or None, row.TaskType or None, row.SubmissionTime or None,
+                float(row.QC_Passed) if row.QC_Passed else None, int(float(row.QC_Total)) if row.QC_Total else None,
+            )
+            for row in legacy.itertuples(index=False)
+        ]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+            if count:
+                self.conn.rollback()
+                return 0
+            self.conn.executemany(
+                "INSERT INTO tasks (UserID, TaskID, TaskType, SubmissionTime, QC_Passed, QC_Total) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute("UPDATE tasks SET TaskID = 'TASK' || printf('%03d', id) WHERE TaskID IS NULL")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
+
+    def version(self):
+        """Counter that changes whenever a task is written; a cache key for views of the store"""
+        return self.conn.execute("SELECT version FROM store_version").fetchone()[0]
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None
+
+    def query(self, sql, params=()):
+        """Frame for a query over tasks, with time columns parsed and score columns as floats even when empty"""
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        for col in ("SubmissionTime", "Last_Submission"):
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format="mixed")
+        for col in ("QC_Passed", "Avg_Accuracy", "passed_sum"):
+            if col in df.columns:
+                df[col] = df[col].astype(float)
+        return df
+
+    def frame(self):
+        """Every task in submission order, with SubmissionTime parsed"""
+        return self.query(f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks ORDER BY id")
+
+    def user_ids(self):
+        """Users with at least one task, in order of their first submission"""
+        return [user for (user,) in self.conn.execute("SELECT UserID FROM user_rollup ORDER BY first_id")]
+
+    def leaderboard(self, user=None):
+        """Per-user task count, mean QC_Passed and last submission from the rollup; one user's row if given"""
+        sql = (
+            "SELECT UserID, tasks AS Tasks, passed_sum / nullif(passed_count, 0) AS Avg_Accuracy, "
+            "last_submission AS Last_Submission FROM user_rollup"
+        )
+        if user is not None:
+            return self.query(sql + " WHERE UserID = ?", (user,))
+        return self.query(sql)
+
+    def shift_rollup(self, user, since_date):
+        """One user's per-shift-day task counts and QC_Passed sums for shifts starting on or after since_date"""
+        return self.query(
+            "SELECT shift_date, tasks, passed_sum, passed_count FROM shift_rollup "
+            "WHERE UserID = ? AND shift_date >= ? ORDER BY shift_date",
+            (user, since_date.isoformat())
+        )
+
+    def user_tasks(self, user, columns=("TaskID", "SubmissionTime", "QC_Passed"), since=None, until=None):
+        """One user's tasks in SubmissionTime order, only the given columns, optionally since <= SubmissionTime < until.
+
+        The (UserID, SubmissionTime) index makes this a range lookup that
+        also yields the rows already sorted, however long the history.
+        """
+        sql = f"SELECT {', '.join(columns)} FROM tasks WHERE UserID = ?"
+        params = [user]
+        if since is not None:
+            # Stored times have whole seconds, so a fractional since rounds up
+            sql += " AND SubmissionTime >= ?"
+            params.append(pd.Timestamp(since).ceil("s").strftime(TIME_FORMAT))
+        if until is not None:
+            sql += " AND SubmissionTime < ?"
+            params.append(until.strftime(TIME_FORMAT))
+        return self.query(sql + " ORDER BY SubmissionTime", params)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(path=TASK_DB_PATH, legacy_csv=None):
+    """TaskStore at path, seeded from legacy_csv (if given) the first time it is opened empty"""
+    store = TaskStore(path)
+    if legacy_csv and os.path.exists(legacy_csv) and store.is_empty():
+        store.import_csv(legacy_csv)
+    return store
+
+
+def prepare_store(path=TASK_DB_PATH, legacy_csv=None):
+    """Set up (and seed, see open_store) the store at path once per process, so readers can open it read_only"""
+    key = (os.path.abspath(path), legacy_csv)
+    if key not in seeded_stores:
+        open_store(path, legacy_csv).close()
+        seeded_stores.add(key)
+
+
+class TaskWriter:
+    """Writes submissions to a TaskStore from one background thread, so submitting never waits on disk.
+
+    submit() hands back the task with its TaskID at once. Each id is
+    reserved in the store when the task is submitted, in one short write on a
+    connection the writer keeps open, so ids are unique across processes
+    and follow submission order. The writer thread commits whatever has
+    queued up, at most batch_size tasks per transaction, with
+    synchronous=FULL so every batch is fsynced; during a burst the queue
+    grows while a commit runs and the next batch is larger. legacy_csv, if
+    given, seeds an empty store (see open_store).
+
+    A batch the store still reports locked after MAX_RETRIES more tries, or
+    rejects outright, is logged and appended to the fallback file next to the
+    store (path + FAILED_SUFFIX). Set-aside tasks are replayed when a writer
+    starts and after each batch that does get written. Until then error
+    describes them, for the pages to show.
+    """
+
+    def __init__(self, path=TASK_DB_PATH, batch_size=BATCH_SIZE, legacy_csv=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.id_lock = threading.Lock()
+        self.done = threading.Condition()
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.error = None
+        self.failed_path = path + FAILED_SUFFIX
+        self.unsaved = []  # set-aside tasks the fallback file could not take either
+        open_store(path, legacy_csv).close()
+        # Submissions arrive on the callers' threads; id_lock serializes them on this connection
+        self.id_store = TaskStore(path, check_same_thread=False)
+        self.id_store.conn.execute("PRAGMA synchronous=NORMAL")
+        self.thread = threading.Thread(target=self.run, name="task-writer", daemon=True)
+        self.thread.start()
+
+    def allocate_id(self):
+        with self.id_lock:
+            return self.id_store.reserve_ids(1)
+
+    def submit(self, user, task_type, qc_passed, qc_total=100):
+        """Queue one task and return it with its TaskID; it reaches the store shortly after"""
+        number = self.allocate_id()
+        task = {
+            "UserID": user,
+            "TaskID": task_id(number),
+            "TaskType": task_type,
+            "SubmissionTime": datetime.now().strftime(TIME_FORMAT),
+            "QC_Passed": qc_passed,
+            "QC_Total": qc_total,
+        }
+        with self.done:
+            self.submitted += 1
+        self.queue.put((number, task))
+        return task
+
+    def run(self):
+        store = TaskStore(self.path)
+        store.conn.execute("PRAGMA synchronous=FULL")
+        try:
+            self.replay_failed(store)
+            stopping = False
+            while not stopping:
+                item = self.queue.get()
+                batch = []
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                stopping = item is None
+                if batch:
+                    self.write(store, batch)
+        finally:
+            store.close()
+
+    def write(self, store, batch):
+        error = None
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                store.insert_tasks(batch)
+                error = None
+                break
+            except sqlite3.OperationalError as e:  # locked or unavailable; retry a few times
+                error = e
+                if attempt < MAX_RETRIES:
+                    time.sleep(RETRY_SECONDS)
+            except sqlite3.Error as e:
+                error = e
+                break
+        if error is not None:
+            self.set_aside(batch, error)
+        elif self.unsaved or os.path.exists(self.failed_path):
+            self.replay_failed(store)
+        with self.done:
+            self.written += len(batch)
+            self.done.notify_all()
+
+    def set_aside(self, batch, error):
+        """Log a batch the store would not take and keep it in the fallback file (or memory) for replay_failed"""
+        try:
+            with open(self.failed_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps({"id": number, **task}) + "\n" for number, task in batch)
+            kept = f"saved to {self.failed_path} to be retried"
+        except OSError as e:
+            self.unsaved.extend(batch)
+            kept = f"kept in memory to be retried, since {self.failed_path} could not be written ({e})"
+        logger.error("Could not write %d QC tasks to %s: %s; %s", len(batch), self.path, error, kept)
+        with self.done:
+            self.failed += len(batch)
+            self.error = f"{self.failed} QC submissions could not be written to {self.path} ({error}); {kept}."
+
+    def replay_failed(self, store):
+        """Write set-aside tasks into the store, clearing error once none are left"""
+        claimed = f"{self.failed_path}.{os.getpid()}"
+        try:
+            # New failures, here or in another process, start a fresh fallback file meanwhile
+            os.replace(self.failed_path, claimed)
+            with open(claimed, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            claimed, lines = None, []
+        except OSError as e:
+            logger.warning("Could not read set-aside QC tasks from %s: %s", self.failed_path, e)
+            return
+        tasks = list(self.unsaved)
+        for line in lines:
+            try:
+                record = json.loads(line)
+                tasks.append((record.pop("id"), record))
+            except (ValueError, KeyError, AttributeError):  # e.g. a line cut short when a process died
+                logger.warning("Skipping unreadable set-aside QC task in %s: %r", self.failed_path, line)
+        try:
+            restored = store.restore_tasks(tasks) if tasks else 0
+        except sqlite3.Error as e:
+            logger.warning("Could not replay %d set-aside QC tasks into %s: %s", len(tasks), self.path, e)
+            if claimed:
+                with open(self.failed_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                os.remove(claimed)
+            return
+        if claimed:
+            os.remove(claimed)
+        self.unsaved.clear()
+        if tasks:
+            logger.info("Replayed %d set-aside QC tasks into %s", restored, self.path)
+        with self.done:
+            if not os.path.exists(self.failed_path):
+                self.failed = 0
+                self.error = None
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is written; False if timeout passed first"""
+        with self.done:
+            return self.done.wait_for(lambda: self.written >= self.submitted, timeout)
+
+    def close(self, timeout=None):
+        """Write the remaining queue and stop the thread"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+        with self.id_lock:
+            self.id_store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a task_data.csv into the QC task store.")
+    parser.add_argument("csv", nargs="?", default=LEGACY_CSV_PATH, help=f"CSV to import (default: {LEGACY_CSV_PATH})")
+    parser.add_argument("--db", default=TASK_DB_PATH, help=f"task store file (default: {TASK_DB_PATH})")
+    args = parser.parse_args(argv)
+    store = TaskStore(args.db)
+    try:
+        imported = store.import_csv(args.csv)
+    finally:
+        store.close()
+    print(f"Imported {imported} tasks into {args.db}" if imported else f"{args.db} already holds tasks; nothing imported")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
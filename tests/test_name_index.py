@@ -0,0 +1,140 @@
+"""NameIndex against the brute-force matching it replaced, on generated rosters."""
+import random
+
+import pandas as pd
+import pytest
+from thefuzz import fuzz
+
+from match_cache import MatchCache
+from name_index import NameIndex, NormalizedName, formats_match, normalize_name
+
+FIRST = [
+    "john", "jon", "al", "ann", "joann", "li", "wu", "christopher", "christophers", "mary", "maryann", "jo", "ed",
+    "bo", "ty", "mohammed", "muhammad", "alexander", "alex", "sam",
+]
+LAST = ["smith", "smyth", "smithson", "lee", "leeds", "wu", "li", "o'neil", "oneil", "johnson", "johnsen",
+        "van der berg", "garcia", "ng", "al"]
+
+
+def names_match(name1, name2):
+    """The sequential matcher All Trans used before NameIndex"""
+    if pd.isna(name1) or pd.isna(name2) or not name1 or not name2:
+        return False
+    formats1 = normalize_name(name1)
+    formats2 = normalize_name(name2)
+    for f1 in formats1:
+        for f2 in formats2:
+            if f1 == f2:
+                return True
+            if fuzz.token_set_ratio(f1, f2) >= 95:
+                return True
+            if fuzz.partial_ratio(f1, f2) >= 96:
+                return True
+            if fuzz.token_sort_ratio(f1, f2) >= 98:
+                return True
+    return False
+
+
+def typo(rng, text):
+    if len(text) < 3 or rng.random() < 0.6:
+        return text
+    i = rng.randrange(len(text))
+    c = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    op = rng.random()
+    if op < 0.33:
+        return text[:i] + c + text[i + 1:]
+    if op < 0.66:
+        return text[:i] + text[i + 1:]
+    return text[:i] + c + text[i:]
+
+
+def random_name(rng):
+    """A driver name with typos, initials, swapped order, titles and the odd blank"""
+    r = rng.random()
+    if r < 0.03:
+        return rng.choice(["", None, float("nan")])
+    parts = [typo(rng, rng.choice(FIRST))]
+    if r < 0.4:
+        parts.append(rng.choice(FIRST)[:rng.choice([1, 10])])
+    if r > 0.05:
+        parts.append(typo(rng, rng.choice(LAST)))
+    if rng.random() < 0.5:
+        parts.reverse()
+    name = " ".join(parts)
+    if rng.random() < 0.1:
+        name = "Mr. " + name.upper()
+    return name
+
+
+def roster(seed, size):
+    rng = random.Random(seed)
+    return [random_name(rng) for _ in range(size)]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_candidates_keep_every_match(seed):
+    names = roster(seed, 200)
+    index = NameIndex(names)
+    for query in names[:60]:
+        normalized = NormalizedName(query)
+        candidates = set(index.candidates(normalized))
+        missed = [
+            pos for pos, driver in enumerate(index.names)
+            if formats_match(normalized.formats, driver.formats) and pos not in candidates
+        ]
+        assert not missed, (query, [names[pos] for pos in missed])
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_score_block_agrees_with_formats_match(seed):
+    names = roster(seed, 150)
+    index = NameIndex(names)
+    positions = list(range(len(index)))
+    for query in roster(seed + 100, 40):
+        normalized = NormalizedName(query)
+        if not normalized.formats:
+            continue
+        expected = [pos for pos in positions if formats_match(normalized.formats, index.names[pos].formats)]
+        assert index.score_block(normalized, positions, workers=1) == expected, query
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_match_all_agrees_with_sequential_loop(seed):
+    drivers = roster(seed, 150)
+    output = roster(seed + 100, 150)
+    taken = set()
+    expected = []
+    for name in output:
+        hit = None
+        for pos, driver in enumerate(drivers):
+            if pos not in taken and names_match(name, driver):
+                hit = pos
+                taken.add(pos)
+                break
+        expected.append(hit)
+    index = NameIndex(drivers)
+    assert index.match_all(output, workers=1) == expected
+    assert index.resolved["exact"] > 0
+
+
+def test_match_cache_reuses_hits_across_runs(tmp_path):
+    drivers = roster(5, 200)
+    output = roster(105, 200)
+    # A second run in another order excludes different drivers when each name comes up
+    shuffled = output[::-1]
+    cache = MatchCache(str(tmp_path / "cache.sqlite"))
+    try:
+        assert NameIndex(drivers).match_all(output, workers=1, cache=cache) == NameIndex(drivers).match_all(
+            output, workers=1
+        )
+    finally:
+        cache.close()
+    cache = MatchCache(str(tmp_path / "cache.sqlite"))
+    try:
+        assert NameIndex(drivers).match_all(shuffled, workers=1, cache=cache) == NameIndex(drivers).match_all(
+            shuffled, workers=1
+        )
+        (entries,) = cache.conn.execute("SELECT COUNT(*) FROM matches").fetchone()
+        assert 0 < entries <= len(set(NormalizedName(name).key for name in output))
+    finally:
+        cache.close()
@@ -0,0 +1,31 @@
+"""run_batch with uploads that share a file name."""
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from qc_batch import run_batch
+from test_qc_engine import hdvi_workbook
+
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+
+def test_same_named_uploads_keep_their_own_rows_and_reports(tmp_path):
+    hdvi_workbook(tmp_path / "a.xlsx", 30, seed=1)
+    hdvi_workbook(tmp_path / "b.xlsx", 50, seed=2)
+    files = [
+        ("hdvi.xlsx", (tmp_path / "a.xlsx").read_bytes()),
+        ("HDVI.xlsx", (tmp_path / "b.xlsx").read_bytes()),
+        ("hdvi.xlsx", b"not a workbook"),
+        ("hdvi.xlsx", (tmp_path / "b.xlsx").read_bytes()),
+    ]
+    summary, archive = run_batch(files, jobs=2)
+    assert summary["File"].tolist() == [name for name, _ in files]
+    assert summary["Rows"].tolist()[:2] == [30, 50] and summary["Rows"].tolist()[3] == 50
+    assert summary["Error"].tolist()[0] == "" and summary["Error"].tolist()[2] != ""
+    reports = summary["Report"].tolist()
+    assert reports[0] == "hdvi_qc_results.xlsx" and pd.isna(reports[2])
+    with zipfile.ZipFile(archive) as zf:
+        assert sorted(zf.namelist()) == sorted(report for report in reports if isinstance(report, str))
+        assert len(pd.read_excel(io.BytesIO(zf.read(reports[1])))) == 50
@@ -0,0 +1,237 @@
+"""run_qc and its cached and streaming variants against the row-by-row QC Radar loop they replaced."""
+import datetime as dt
+import random
+from datetime import date
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from qc_engine import HDVI_SHEET, hdvi_frame, normalize_mvr_received, run_qc, scan_hdvi, stream_qc
+from qc_row_cache import QCRowCache
+
+pytestmark = pytest.mark.filterwarnings("ignore")
+
+DATES = [
+    dt.datetime(1980, 2, 29), dt.datetime(2000, 2, 29), dt.datetime(2030, 1, 1), dt.datetime(1990, 5, 5),
+    "1985-03-04", "03/04/2001", "13/04/2001", "garbage", None, float("nan"), "", "  ", "N/A", "n/a", 12345, 1.5,
+    True, pd.Timestamp("2010-01-01"), dt.date(1970, 1, 1), "2099-12-31", dt.datetime(2024, 2, 29), pd.NaT,
+    "0001-01-01", dt.datetime(9990, 1, 1),
+]
+NUMBERS = [
+    35, 35.0, 35.7, "35", "35.0", "abc", None, float("nan"), "", True, -3, 1e308, float("inf"), 0, -0.0, 60, 18, 2,
+    "N/A", 5.5, 10**30, np.int64(40), np.float64(2.25),
+]
+TEXT = ["John", "", "  ", None, float("nan"), "N/A", 1, 1.0, "x y", "A", "b", " c ", "D", "AB-12", "ab_12", "--", "-",
+        "1-2-3", True, 0]
+COLUMNS = {
+    "First Name": TEXT, "Last Name": TEXT, "Date of Birth": DATES, "Age": NUMBERS, "Years of Experience": NUMBERS,
+    "Hire Date": DATES, "Years of Tenure": NUMBERS, "License State": TEXT, "CDL Number": TEXT, "CDL Type": TEXT,
+    "Expiration Date": DATES,
+}
+DROPS = [(), ("Age",), ("Date of Birth", "CDL Type"), ("Hire Date", "Years of Tenure", "Expiration Date", "CDL Number"),
+         ("Years of Experience",)]
+
+
+def row_loop_qc(df: pd.DataFrame):
+    """QC Radar's original run_qc, checking one row at a time"""
+    today = date.today()
+    df.columns = [str(col).strip() for col in df.columns]
+    df.replace(regex={r"(?i)^\s*$": pd.NA, r"(?i)^N/A$": pd.NA}, inplace=True)
+
+    required_fields = [
+        "First Name", "Last Name", "Date of Birth", "Age",
+        "Years of Experience", "Hire Date", "Years of Tenure",
+        "License State", "CDL Number", "CDL Type", "Expiration Date"
+    ]
+    allowed_cdl_types = {"A", "B", "C"}
+
+    results = []
+    tag_counts = {"valid": 0, "partial": 0, "fail": 0}
+    total_deductions = 0
+
+    for idx, row in df.iterrows():
+        issues = []
+        score = 100
+
+        def deduct(points, reason):
+            nonlocal score
+            score -= points
+            issues.append(reason)
+
+        for field in required_fields:
+            if pd.isna(row.get(field)) or str(row.get(field)).strip() == "":
+                deduct(10, f"{field} missing")
+
+        try:
+            dob = pd.to_datetime(row["Date of Birth"], errors="coerce").date()
+            if dob >= today:
+                deduct(15, "DOB is in the future")
+        except:  # noqa: E722 - kept as written
+            dob = None
+
+        try:
+            age = int(row["Age"])
+            if dob:
+                expected_age = (today - dob).days // 365
+                if abs(expected_age - age) > 1:
+                    deduct(15, f"Age mismatch (expected ~{expected_age}, got {age})")
+        except:  # noqa: E722
+            pass
+
+        try:
+            exp = float(row["Years of Experience"])
+            if 'age' in locals() and exp > age - 18:
+                deduct(10, f"Experience too high for age {age}")
+        except:  # noqa: E722
+            pass
+
+        try:
+            hire = pd.to_datetime(row["Hire Date"], errors="coerce").date()
+            if dob and hire < dob.replace(year=dob.year + 18):
+                deduct(20, "Hire before legal age (18)")
+        except:  # noqa: E722
+            hire = None
+
+        try:
+            tenure = float(row["Years of Tenure"])
+            if hire:
+                expected_tenure = (today - hire).days / 365.25
+                if abs(expected_tenure - tenure) > 1:
+                    deduct(5, f"Tenure mismatch (expected ~{expected_tenure:.2f}, got {tenure})")
+        except:  # noqa: E722
+            pass
+
+        try:
+            exp_date = pd.to_datetime(row["Expiration Date"], errors="coerce").date()
+            if exp_date < today:
+                deduct(20, f"License expired on {exp_date}")
+        except:  # noqa: E722
+            pass
+
+        cdl_type = str(row.get("CDL Type", "")).strip().upper()
+        if cdl_type and cdl_type not in allowed_cdl_types:
+            deduct(5, f"Unexpected CDL Type '{cdl_type}'")
+
+        cdl_num = str(row.get("CDL Number", "")).strip()
+        if cdl_num and not cdl_num.replace("-", "").isalnum():
+            deduct(5, "CDL Number not alphanumeric")
+
+        if score >= 90:
+            tag = "✅ Valid"
+            tag_counts["valid"] += 1
+        elif score >= 75:
+            tag = "⚠️ Partial"
+            tag_counts["partial"] += 1
+        else:
+            tag = "❌ High Risk"
+            tag_counts["fail"] += 1
+
+        results.append({"QC Tag": tag, "QC Issues": "; ".join(issues) if issues else "OK"})
+        total_deductions += (100 - score)
+
+    total_possible = 100 * len(df)
+    confidence = round((1 - (total_deductions / total_possible)) * 100, 2)
+
+    qc_df = df.copy().reset_index(drop=True)
+    qc_df = pd.concat([qc_df, pd.DataFrame(results)], axis=1)
+
+    return qc_df, confidence, tag_counts
+
+
+def driver_frame(rng, rows, drop=()):
+    """Driver rows drawn from edge-case cells: blanks, junk, odd types, leap days and out-of-range dates"""
+    data = {col: [rng.choice(values) for _ in range(rows)] for col, values in COLUMNS.items() if col not in drop}
+    data[" MVR Received "] = [rng.choice(["TRUE", "FALSE"]) for _ in range(rows)]
+    return pd.DataFrame(data, dtype=object)
+
+
+def assert_same_result(result, expected):
+    qc_df, confidence, tag_counts = result
+    assert confidence == expected[1]
+    assert tag_counts == expected[2]
+    assert qc_df["QC Issues"].tolist() == expected[0]["QC Issues"].tolist()
+    assert qc_df.equals(expected[0])
+    assert list(qc_df.dtypes) == list(expected[0].dtypes)
+
+
+@pytest.mark.parametrize("drop", DROPS)
+def test_run_qc_matches_row_loop(drop):
+    df = driver_frame(random.Random(len(drop)), 400, drop)
+    assert_same_result(run_qc(df.copy()), row_loop_qc(df.copy()))
+
+
+def test_run_qc_on_text_only_sheet():
+    # pandas reads all-text rows differently in iterrows; the baseline's quirks must carry over
+    rng = random.Random(7)
+    df = pd.DataFrame({col: [rng.choice(["", "N/A", "35", "x", "03/04/2001", "A"]) for _ in range(200)]
+                       for col in COLUMNS})
+    assert_same_result(run_qc(df.copy()), row_loop_qc(df.copy()))
+
+
+def test_cached_run_qc_cold_and_warm(tmp_path):
+    rng = random.Random(11)
+    df = driver_frame(rng, 400)
+    # Rows 101-102 have no Age of their own, so they are checked against the one carried from row 100
+    df.loc[100:102, "Age"] = [61, "abc", None]
+    df.loc[100:102, "Years of Experience"] = 30
+    cache = QCRowCache(str(tmp_path / "qc_row_cache.sqlite"))
+    try:
+        assert_same_result(run_qc(df.copy(), cache=cache), row_loop_qc(df.copy()))
+        assert (cache.hits, cache.misses) == (0, len(df))
+
+        cache.hits = cache.misses = 0
+        assert_same_result(run_qc(df.copy(), cache=cache), row_loop_qc(df.copy()))
+        assert (cache.hits, cache.misses) == (len(df), 0)
+
+        # Edits include Age cells, which change the Age carried into later rows
+        edited = df.copy()
+        for i in rng.sample(range(len(df)), 20):
+            col = rng.choice(list(COLUMNS))
+            edited.iat[i, edited.columns.get_loc(col)] = rng.choice(COLUMNS[col])
+        edited.loc[100, "Age"] = 20
+        cache.hits = cache.misses = 0
+        assert_same_result(run_qc(edited.copy(), cache=cache), row_loop_qc(edited.copy()))
+        assert cache.hits > 0 and cache.misses > 0
+    finally:
+        cache.close()
+
+
+def hdvi_workbook(path, rows, seed):
+    """An HDVI workbook: a banner row, the header row, then driver rows of cells Excel can hold"""
+    rng = random.Random(seed)
+    header = [*COLUMNS, "MVR Received"]
+    pool = [None, "", " ", "N/A", "x", "A", "B-1", 3, 35, 35.5, dt.datetime(1980, 2, 29), dt.datetime(1990, 1, 1),
+            dt.datetime(2030, 1, 1), "1990-01-01", "03/04/2001", "TRUE", " false ", True]
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = HDVI_SHEET
+    ws.append(["HDVI output"])
+    ws.append(header)
+    for _ in range(rows):
+        ws.append([rng.choice(pool) for _ in header])
+    wb.save(path)
+
+
+def test_stream_qc_matches_whole_sheet(tmp_path):
+    source = tmp_path / "hdvi.xlsx"
+    hdvi_workbook(source, 600, seed=5)
+    df = hdvi_frame(pd.read_excel(source, sheet_name=HDVI_SHEET, header=None))
+    normalize_mvr_received(df)
+    expected = row_loop_qc(df.copy())
+    full = run_qc(df)
+    assert_same_result(full, expected)
+
+    scan = scan_hdvi(str(source))
+    assert scan["rows"] == len(df)
+    # Chunks much smaller than the sheet, so the carried Age crosses chunk boundaries
+    confidence, tag_counts, preview = stream_qc(
+        str(source), str(tmp_path / "stream.xlsx"), scan["width"], scan["rows"], chunk_rows=128
+    )
+    assert confidence == expected[1]
+    assert tag_counts == expected[2]
+    assert preview.equals(expected[0][["QC Tag", "QC Issues"]])
+
+    full[0].to_excel(tmp_path / "full.xlsx", index=False)
+    assert pd.read_excel(tmp_path / "stream.xlsx").equals(pd.read_excel(tmp_path / "full.xlsx"))
@@ -0,0 +1,71 @@
+"""TaskWriter ids and failure handling on temporary stores."""
+import sqlite3
+
+import pytest
+
+from task_store import FAILED_SUFFIX, TaskStore, TaskWriter, prepare_store, task_id
+
+
+def test_ids_follow_submission_order_without_gaps(tmp_path):
+    path = str(tmp_path / "tasks.sqlite")
+    writers = [TaskWriter(path), TaskWriter(path)]
+    submitted = [writers[i % 2].submit(f"u{i}", "IFTA", 90.0)["TaskID"] for i in range(10)]
+    for writer in writers:
+        assert writer.flush(5)
+        writer.close(5)
+    writers = [TaskWriter(path)]  # a restart does not skip ids either
+    submitted.append(writers[0].submit("u", "IFTA", 90.0)["TaskID"])
+    writers[0].close(5)
+    assert submitted == [task_id(number) for number in range(1, 12)]
+    with TaskStore(path) as store:
+        assert sorted(store.frame()["TaskID"]) == sorted(submitted)
+
+
+def test_only_an_explicit_legacy_csv_seeds_a_store(tmp_path):
+    writer = TaskWriter(str(tmp_path / "tasks.sqlite"))
+    writer.close(5)
+    with TaskStore(str(tmp_path / "tasks.sqlite")) as store:
+        assert store.is_empty()
+    legacy = tmp_path / "task_data.csv"
+    legacy.write_text(
+        "UserID,TaskID,TaskType,SubmissionTime,QC_Passed,QC_Total\nold,TASK007,IFTA,2025-07-01 20:00:00,1,1\n"
+    )
+    writer = TaskWriter(str(tmp_path / "seeded.sqlite"), legacy_csv=str(legacy))
+    writer.close(5)
+    with TaskStore(str(tmp_path / "seeded.sqlite")) as store:
+        assert store.frame()["TaskID"].tolist() == ["TASK007"]
+
+
+def test_read_only_store_sees_new_tasks_and_refuses_writes(tmp_path):
+    path = str(tmp_path / "tasks.sqlite")
+    prepare_store(path)
+    with TaskStore(path, read_only=True) as reader, TaskStore(path) as writer:
+        assert reader.is_empty() and reader.version() == 0
+        writer.append("u", "IFTA", 1.0)
+        assert not reader.is_empty() and reader.version() == 1
+        with pytest.raises(sqlite3.OperationalError):
+            reader.append("v", "IFTA", 1.0)
+
+
+def test_failed_batch_is_set_aside_and_replayed(tmp_path, monkeypatch):
+    path = str(tmp_path / "tasks.sqlite")
+    insert_tasks = TaskStore.insert_tasks
+
+    def broken(self, tasks):
+        raise sqlite3.DatabaseError("disk image is malformed")
+
+    monkeypatch.setattr(TaskStore, "insert_tasks", broken)
+    writer = TaskWriter(path)
+    task = writer.submit("u", "IFTA", 80.0)
+    assert writer.flush(5)
+    assert writer.error and (tmp_path / ("tasks.sqlite" + FAILED_SUFFIX)).exists()
+    writer.close(5)
+
+    monkeypatch.setattr(TaskStore, "insert_tasks", insert_tasks)
+    writer = TaskWriter(path)
+    writer.submit("v", "IFTA", 70.0)
+    assert writer.flush(5)
+    writer.close(5)
+    assert writer.error is None and not (tmp_path / ("tasks.sqlite" + FAILED_SUFFIX)).exists()
+    with TaskStore(path) as store:
+        assert task["TaskID"] in store.frame()["TaskID"].tolist()
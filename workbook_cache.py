@@ -0,0 +1,96 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def content_hash(source):
+    """SHA-1 of an uploaded file or path, used to recognise the same workbook across reruns"""
+    if hasattr(source, "getvalue"):
+        data = source.getvalue()
+    elif hasattr(source, "read"):
+        source.seek(0)
+        data = source.read()
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    return hashlib.sha1(data).hexdigest()
+
+
+def entry_size(value):
+    """Approximate memory held by a cached value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sum(entry_size(v) for v in value.values())
+    return 1024
+
+
+def copy_value(value):
+    """Copy handed to callers so in-place edits never reach the cached frame"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: copy_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+class WorkbookCache:
+    """Least-recently-used cache of parsed workbook data, bounded by total memory.
+
+    Keys start with the upload's content hash, so re-uploading or re-running
+    with the same file reuses the parsed frames while any change to the file
+    misses. Entries larger than max_bytes are returned but not kept.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """Cached value for key, calling loader() on a miss; always returns a copy"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return copy_value(self.entries[key][0])
+        value = loader()
+        size = entry_size(value)
+        with self.lock:
+            if key not in self.entries and size <= self.max_bytes:
+                self.entries[key] = (value, size)
+                self.size += size
+                while self.size > self.max_bytes:
+                    _, (_, old_size) = self.entries.popitem(last=False)
+                    self.size -= old_size
+        return copy_value(value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+workbook_cache = WorkbookCache()
+
+
+def sheet_names(source):
+    """Sheet names of a workbook, parsed once per file content"""
+    return workbook_cache.get_or_load(
+        (content_hash(source), "sheet_names"), lambda: pd.ExcelFile(source).sheet_names
+    )
+
+
+def read_excel(source, sheet_name=0, skiprows=None, header=0):
+    """pd.read_excel through the shared cache, keyed by file content, sheet, skiprows and header"""
+    key = (content_hash(source), "read_excel", sheet_name, skiprows, header)
+    return workbook_cache.get_or_load(
+        key, lambda: pd.read_excel(source, sheet_name=sheet_name, skiprows=skiprows, header=header)
+    )
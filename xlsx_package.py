@@ -0,0 +1,145 @@
+import io
+import math
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+EXCEL_EPOCH = datetime(1899, 12, 30)
+DATE_FORMAT_ID = 14  # Built-in short date
+DATETIME_FORMAT_ID = 22  # Built-in date + time
+ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def column_letter(idx):
+    """Excel column letters for a zero-based column index"""
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def sheet_part(zin, sheet_name):
+    """Zip path of the worksheet XML for sheet_name"""
+    workbook = zin.read("xl/workbook.xml").decode("utf-8")
+    rels = zin.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    for tag in re.findall(r"<(?:\w+:)?sheet\b[^>]*>", workbook):
+        name = re.search(r'\bname="([^"]*)"', tag).group(1)
+        if name != escape(sheet_name, {'"': "&quot;"}):
+            continue
+        rel_id = re.search(r'\br:id="([^"]*)"', tag).group(1)
+        for rel in re.findall(r"<Relationship\b[^>]*>", rels):
+            if f'Id="{rel_id}"' in rel:
+                target = re.search(r'\bTarget="([^"]*)"', rel).group(1)
+                if target.startswith("/"):
+                    return target[1:]
+                return posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(f"Sheet '{sheet_name}' not found in workbook")
+
+
+def add_date_styles(styles):
+    """Append date and datetime cell formats to styles.xml, returning (styles, date_style, datetime_style)"""
+    match = re.search(r'<cellXfs\b[^>]*\bcount="(\d+)"[^>]*>', styles)
+    if not match or "</cellXfs>" not in styles:
+        return styles, None, None
+    count = int(match.group(1))
+    new_xfs = (
+        f'<xf numFmtId="{DATE_FORMAT_ID}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        f'<xf numFmtId="{DATETIME_FORMAT_ID}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    )
+    opening = match.group(0).replace(f'count="{count}"', f'count="{count + 2}"')
+    styles = styles[:match.start()] + opening + styles[match.end():]
+    styles = styles.replace("</cellXfs>", new_xfs + "</cellXfs>", 1)
+    return styles, count, count + 1
+
+
+def cell_xml(ref, value, date_style, datetime_style):
+    """XML for one cell, or "" for blanks"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value) or math.isinf(value):
+            return ""
+        return f'<c r="{ref}"><v>{repr(float(value))}</v></c>'
+    if isinstance(value, (datetime, date)) and date_style is not None:
+        if isinstance(value, datetime):
+            value = value.replace(tzinfo=None)
+            style = datetime_style if (value.hour, value.minute, value.second, value.microsecond) != (0, 0, 0, 0) else date_style
+        else:
+            value = datetime(value.year, value.month, value.day)
+            style = date_style
+        serial = (value - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="{style}"><v>{repr(serial)}</v></c>'
+    text = ILLEGAL_XML_CHARS.sub("", str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def sheet_xml(df, date_style, datetime_style):
+    """Worksheet XML for df (header row + values) using inline strings only"""
+    letters = [column_letter(i) for i in range(len(df.columns))]
+    rows = []
+    header = "".join(cell_xml(f"{letters[i]}1", str(col), None, None) for i, col in enumerate(df.columns))
+    rows.append(f'<row r="1">{header}</row>')
+    for row_num, values in enumerate(df.itertuples(index=False, name=None), start=2):
+        cells = "".join(
+            cell_xml(f"{letters[i]}{row_num}", value, date_style, datetime_style) for i, value in enumerate(values)
+        )
+        rows.append(f'<row r="{row_num}">{cells}</row>')
+    last_col = letters[-1] if letters else "A"
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<worksheet xmlns="{MAIN_NS}"><dimension ref="A1:{last_col}{len(df) + 1}"/>'
+        f'<sheetData>{"".join(rows)}</sheetData></worksheet>'
+    )
+
+
+def replace_sheet(source, sheet_name, df):
+    """Copy an .xlsx package with one worksheet regenerated from df, leaving every other part as is.
+
+    Other sheets, shared strings, formatting and defined names are copied
+    byte for byte instead of being parsed and rewritten. The new sheet uses
+    inline strings so the shared string table stays valid, and calcChain.xml
+    is dropped so Excel rebuilds it. Returns a BytesIO positioned at 0.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    result = io.BytesIO()
+    with zipfile.ZipFile(source) as zin:
+        target = sheet_part(zin, sheet_name)
+        target_rels = posixpath.join(posixpath.dirname(target), "_rels", posixpath.basename(target) + ".rels")
+        names = zin.namelist()
+        styles, date_style, datetime_style = None, None, None
+        if "xl/styles.xml" in names:
+            styles, date_style, datetime_style = add_date_styles(zin.read("xl/styles.xml").decode("utf-8"))
+        with zipfile.ZipFile(result, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                name = info.filename
+                if name in (target_rels, "xl/calcChain.xml"):
+                    continue
+                if name == target:
+                    data = sheet_xml(df, date_style, datetime_style).encode("utf-8")
+                elif name == "xl/styles.xml" and styles is not None:
+                    data = styles.encode("utf-8")
+                elif name == "[Content_Types].xml":
+                    data = re.sub(
+                        rb'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', b"", zin.read(name)
+                    )
+                elif name == "xl/_rels/workbook.xml.rels":
+                    data = re.sub(rb'<Relationship\b[^>]*Target="[^"]*calcChain\.xml"[^>]*/>', b"", zin.read(name))
+                else:
+                    data = zin.read(name)
+                zout.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+    result.seek(0)
+    return result